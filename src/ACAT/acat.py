@@ -1,27 +1,61 @@
+import numpy as np
 import pandas as pd
-import sqlite3
 
 class ACAT:
+    LIKERT_THRESHOLDS = np.array([60, 70, 80, 90])
+
     def __init__(self, course_name, semester, section, outcomes, student_data):
         self.course_name = course_name
         self.semester = semester
         self.section = section
         self.outcomes = outcomes
         self.student_data = student_data
-    
+
     def compute_course_outcomes(self):
-        student_outcomes = {}
-        for student_id, grades in self.student_data.items():
-            print("\n\nstudent_id: ", student_id)
-            print("grades\n", grades)
-            student_outcomes[student_id] = {}
-            for outcome, criteria in self.outcomes.items():
-                outcome_scores = [grades[criterion] for criterion in criteria if criterion in grades]
-                avg_score = sum(outcome_scores) / len(outcome_scores) if outcome_scores else 0
-                likert_score = self.to_likert(avg_score)
-                print("\noutcome: ", outcome)
-                student_outcomes[student_id][outcome] = likert_score
-        return student_outcomes
+        student_ids, outcome_names, likert = self.compute_course_outcome_matrix()
+        return {
+            student_id: {outcome: int(score) for outcome, score in zip(outcome_names, row)}
+            for student_id, row in zip(student_ids, likert)
+        }
+
+    def compute_course_outcome_matrix(self):
+        # Grades become a student x assignment matrix and the outcome -> assignment
+        # mapping an assignment x outcome incidence matrix, so every outcome average
+        # for every student comes out of a single matrix product.
+        student_ids = list(self.student_data.keys())
+        outcome_names = list(self.outcomes.keys())
+        assignments = list(dict.fromkeys(
+            criterion for criteria in self.outcomes.values() for criterion in criteria
+        ))
+        assignment_index = {name: i for i, name in enumerate(assignments)}
+
+        incidence = np.zeros((len(assignments), len(outcome_names)))
+        for j, criteria in enumerate(self.outcomes.values()):
+            for criterion in criteria:
+                incidence[assignment_index[criterion], j] += 1
+
+        grades = (
+            pd.DataFrame.from_dict(self.student_data, orient='index')
+            .reindex(index=student_ids, columns=assignments)
+            .to_numpy(dtype=float)
+        )
+        # Which (student, assignment) keys exist at all, from the exploded key
+        # lists, since a missing key and a blank grade are both NaN above.
+        graded = pd.Series(self.student_data, dtype=object).map(list).explode()
+        rows = pd.Index(student_ids).get_indexer(graded.index)
+        cols = pd.Index(assignments).get_indexer(graded.to_numpy())
+        present = np.zeros(grades.shape, dtype=bool)
+        present[rows[cols >= 0], cols[cols >= 0]] = True
+
+        # A criterion missing from a student's grades is left out of the average,
+        # while a blank (NaN) grade poisons it, as the per-student loop did.
+        blank = present & np.isnan(grades)
+        counts = present.astype(float) @ incidence
+        sums = np.where(present & ~blank, grades, 0.0) @ incidence
+        averages = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        averages[(blank.astype(float) @ incidence) > 0] = np.nan
+
+        return student_ids, outcome_names, self.to_likert_array(averages)
 
     @staticmethod
     def to_likert(score):
@@ -36,6 +70,12 @@ class ACAT:
         else:
             return 1
 
+    @classmethod
+    def to_likert_array(cls, scores):
+        scores = np.asarray(scores, dtype=float)
+        likert = np.searchsorted(cls.LIKERT_THRESHOLDS, scores, side='right') + 1
+        return np.where(np.isnan(scores), 1, likert)
+
     def summarize_course_outcomes(self, student_outcomes):
         summary = {}
         for outcome in self.outcomes:
@@ -45,42 +85,79 @@ class ACAT:
             print(f"Course Outcome: {outcome}, Class Likert Average: {avg_score:.2f}")
         return summary
 
-    def save_to_excel(self, student_outcomes, filename):
-        df = pd.DataFrame.from_dict(student_outcomes, orient='index')
-        df.to_excel(filename)
-
-    def save_to_sqlite(self, db_name, student_outcomes):
-        conn = sqlite3.connect(db_name)
-        df = pd.DataFrame.from_dict(student_outcomes, orient='index')
-        table_name = f"{self.course_name}".replace("-", "_")
-        df.to_sql(table_name, con=conn, if_exists='replace', index_label='SIS_User_ID')
-        conn.close()
-
-    def compute_program_outcomes(self, program_config, course_results):
-        program_outcomes = {}
-        for program, outcomes in program_config.items():
-            print("\n\nProgram: ", program)
-            print("\nOutcomes\n", outcomes)
-            program_outcomes[program] = {}
-            for po, course_outcome_ids in outcomes.items():
-                combined_scores = []
-                for outcome_id in course_outcome_ids:
-                    course, semester, outcome_name = outcome_id.split('.')
-                    outcome_key = f"{course}_{semester}"
-                    if outcome_key in course_outcomes_results:
-                        combined_scores.extend(course_outcomes_results[outcome_key][outcome_name])
-                avg_score = sum(combined_scores) / len(combined_scores) if combined_scores else 0
-                program_outcomes[outcome] = avg_score
+    @staticmethod
+    def _outcome_key(outcome_id, parts):
+        # Keys may be given as tuples or as legacy dotted strings; outcome names can
+        # themselves contain dots, so only the leading parts are split off.
+        if isinstance(outcome_id, tuple):
+            return outcome_id
+        return tuple(outcome_id.split('.', parts - 1))
+
+    @staticmethod
+    def _weighted(outcome_ids):
+        # Mapped outcomes as {outcome_id: weight}, or a plain list (weight 1 each).
+        if isinstance(outcome_ids, dict):
+            return outcome_ids.items()
+        return ((outcome_id, 1.0) for outcome_id in outcome_ids)
+
+    @staticmethod
+    def build_outcome_index(course_results):
+        # Pools the CO scores of every section into a score sum and count per
+        # (course, semester, outcome). Keys of course_results are (course, semester)
+        # or (course, semester, section) tuples, or legacy "course_semester" strings;
+        # values are student x outcome frames or {outcome: [scores]} dicts.
+        pieces = []
+        for key, results in course_results.items():
+            course, semester = key[:2] if isinstance(key, tuple) else key.split('_', 1)
+            frame = results if isinstance(results, pd.DataFrame) else pd.DataFrame(
+                {outcome: pd.Series(scores, dtype=float) for outcome, scores in results.items()}
+            )
+            long_scores = frame.melt(var_name='outcome', value_name='score').dropna(subset=['score'])
+            pieces.append(long_scores.assign(course=course, semester=semester))
+        if not pieces:
+            return pd.DataFrame(columns=['sum', 'count'], index=pd.MultiIndex.from_tuples([], names=['course', 'semester', 'outcome']))
+        scores = pd.concat(pieces, ignore_index=True)
+        scores['score'] = scores['score'].astype(float)
+        return scores.groupby(['course', 'semester', 'outcome'])['score'].agg(['sum', 'count'])
+
+    @staticmethod
+    def compute_program_outcomes(program_config, course_results):
+        # program_config: {program: {po: [(course, semester, outcome), ...]}}, or
+        # {(course, semester, outcome): weight} per PO for weighted mappings.
+        # Every program's POs are weighted averages over the pooled student
+        # scores of their mapped COs, in one incidence-matrix product across all
+        # courses, weighted as the per-section propagation is.
+        totals = ACAT.build_outcome_index(course_results)
+        key_position = {key: i for i, key in enumerate(totals.index)}
+        columns = [(program, po) for program, outcomes in program_config.items() for po in outcomes]
+        incidence = np.zeros((len(key_position), len(columns)))
+        for j, (program, po) in enumerate(columns):
+            for outcome_id, weight in ACAT._weighted(program_config[program][po]):
+                position = key_position.get(ACAT._outcome_key(outcome_id, 3))
+                if position is not None:
+                    incidence[position, j] += weight
+        sums = totals['sum'].to_numpy(dtype=float) @ incidence
+        counts = totals['count'].to_numpy(dtype=float) @ incidence
+        averages = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        program_outcomes = {program: {} for program in program_config}
+        for (program, po), avg_score in zip(columns, averages):
+            program_outcomes[program][po] = float(avg_score)
         return program_outcomes
 
-    def compute_institution_outcomes(self, institution_config, program_outcomes_results):
-        institution_outcomes = {}
-        for outcome, program_outcome_ids in institution_config.items():
-            combined_scores = []
-            for po_id in program_outcome_ids:
-                program, po = po_id.split('.')
-                if program in program_outcome_results:
-                    combined_scores.append(program_outcome_results[program][po])
-            avg_score = sum(combined_scores) / len(combined_scores)
-            institution_outcomes[outcome] = avg_score
-        return institution_outcomes
\ No newline at end of file
+    @staticmethod
+    def compute_institution_outcomes(institution_config, program_outcomes_results):
+        # institution_config: {io: [(program, po), ...]}, or {(program, po): weight}
+        # per IO; each IO is the weighted average of its mapped PO averages.
+        po_keys = [(program, po) for program, outcomes in program_outcomes_results.items() for po in outcomes]
+        key_position = {key: i for i, key in enumerate(po_keys)}
+        po_scores = np.array([program_outcomes_results[program][po] for program, po in po_keys], dtype=float)
+        incidence = np.zeros((len(po_keys), len(institution_config)))
+        for j, program_outcome_ids in enumerate(institution_config.values()):
+            for po_id, weight in ACAT._weighted(program_outcome_ids):
+                position = key_position.get(ACAT._outcome_key(po_id, 2))
+                if position is not None:
+                    incidence[position, j] += weight
+        sums = po_scores @ incidence
+        counts = incidence.sum(axis=0)
+        averages = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+        return {outcome: float(avg_score) for outcome, avg_score in zip(institution_config, averages)}
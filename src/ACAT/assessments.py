@@ -0,0 +1,403 @@
+import asyncio
+import os
+from contextlib import contextmanager
+import pandas as pd
+from crewai import Agent, Task, Crew
+from batched_prompts import BATCH_INSTRUCTIONS, DEFAULT_TOKEN_BUDGET, BatchAssessment, level_table, parse_batch_output, plan_batches
+from llm_cache import cache_from_config
+from llm_client import configure_from_config, crew_llm
+from llm_telemetry import BudgetExceeded, get_telemetry
+from pipeline import LEVELS
+from profiles import bucket_profiles, fan_out
+from prompt_encoding import encode_level, stable_prompt
+from rate_limit import AsyncTokenBucket
+from reporting import report
+
+DEFAULT_MODEL = 'gpt-4o-mini'
+DEFAULT_MAX_RPM = 60 * 4
+DEFAULT_CONCURRENCY = 8
+NO_ASSESSMENT = 'No assessment generated'
+ASSESSMENT_COLUMNS = [
+    'Course Outcome Assessment',
+    'Program Outcome Assessment',
+    'Institutional Outcome Assessment',
+    'Overall Assessment',
+]
+
+
+def build_agents(max_rpm=DEFAULT_MAX_RPM, llm=None):
+    course_outcome_agent = Agent(
+        role='Course Outcome Assessment Agent',
+        goal='Analyze student performance at the course outcome level and identify strengths and weaknesses.',
+        backstory='Expert in evaluating course-level student performance data.',
+        llm=llm,
+        max_rpm=max_rpm
+    )
+    program_outcome_agent = Agent(
+        role='Program Outcome Assessment Agent',
+        goal='Assess student capabilities at the program outcome level.',
+        backstory='Specialist in program-level educational assessment.',
+        llm=llm,
+        max_rpm=max_rpm
+    )
+    institutional_outcome_agent = Agent(
+        role='Institutional Outcome Assessment Agent',
+        goal='Evaluate student attainment of institutional goals based on institutional outcome data.',
+        backstory='Experienced in institutional-level outcome analysis with a focus on broad educational goals.',
+        llm=llm,
+        max_rpm=max_rpm
+    )
+    overall_assessment_agent = Agent(
+        role='Student Learning Overall Assessment Agent',
+        goal='Combine CO, PO, and IO data to provide comprehensive student capability insights.',
+        backstory='Expert in synthesizing multi-level educational data for holistic student assessment.',
+        llm=llm,
+        max_rpm=max_rpm
+    )
+    return [course_outcome_agent, program_outcome_agent, institutional_outcome_agent, overall_assessment_agent]
+
+
+def build_crew(sid, co_data, po_data, io_data, agents, parallel=True):
+    # The CO, PO and IO analyses are independent; with parallel=True they run
+    # as async tasks and overall_task starts once all three finish, receiving
+    # their outputs as context. That is two LLM round trips instead of four.
+    course_outcome_agent, program_outcome_agent, institutional_outcome_agent, overall_assessment_agent = agents
+    # Legends and instructions come before the student's scores so every
+    # student of a section shares the same prompt prefix.
+    co_legend, co_table = encode_level(co_data, 'CO')
+    po_legend, po_table = encode_level(po_data, 'PO')
+    io_legend, io_table = encode_level(io_data, 'IO')
+    co_task = Task(
+        description=stable_prompt(co_legend, "Analyze the course outcome data for this student:", f"Student {sid}\n{co_table}"),
+        agent=course_outcome_agent,
+        async_execution=parallel,
+        expected_output=f"Textual summary of student {sid}'s strengths and weaknesses in course outcomes."
+    )
+    po_task = Task(
+        description=stable_prompt(po_legend, "Analyze the program outcome data for this student:", f"Student {sid}\n{po_table}"),
+        agent=program_outcome_agent,
+        async_execution=parallel,
+        expected_output=f"Textual summary of student {sid}'s program-level capabilities."
+    )
+    io_task = Task(
+        description=stable_prompt(io_legend, "Analyze the institutional outcome data for this student:", f"Student {sid}\n{io_table}"),
+        agent=institutional_outcome_agent,
+        async_execution=parallel,
+        expected_output=f"Textual summary of student {sid}'s attainment of institutional goals."
+    )
+    overall_task = Task(
+        description=stable_prompt(
+            '\n\n'.join(legend for legend in (co_legend, po_legend, io_legend) if legend),
+            "Combine the CO, PO and IO data for this student to provide overall capability insights:",
+            f"Student {sid}\n{co_table}\n\n{po_table}\n\n{io_table}"
+        ),
+        agent=overall_assessment_agent,
+        context=[co_task, po_task, io_task],
+        expected_output=f"Comprehensive textual summary of student {sid}'s overall learning capabilities."
+    )
+    return Crew(
+        agents=agents,
+        tasks=[co_task, po_task, io_task, overall_task],
+        verbose=False
+    )
+
+
+def assessment_row(sid, crew_output=None, error=None):
+    tasks_output = crew_output.tasks_output if crew_output is not None else []
+    row = {'SIS User ID': sid}
+    for i, column in enumerate(ASSESSMENT_COLUMNS):
+        row[column] = tasks_output[i].raw if i < len(tasks_output) else NO_ASSESSMENT
+    if error is not None:
+        row['Error'] = str(error)
+    return row
+
+
+def crew_fingerprint(crew):
+    return [
+        {'role': task.agent.role, 'description': task.description, 'expected_output': task.expected_output}
+        for task in crew.tasks
+    ]
+
+
+def llm_identity(agent):
+    llm = agent.llm
+    model = getattr(llm, 'model', None) or getattr(llm, 'model_name', None) or str(llm)
+    return model, getattr(llm, 'temperature', None)
+
+
+def cached_outputs(cache, crew):
+    # Only deterministic crews (temperature 0) are cached: at any other
+    # temperature a stored answer is one sample replayed forever. A locked or
+    # corrupt cache counts as a miss rather than failing the section.
+    if cache is None:
+        return None
+    model, temperature = llm_identity(crew.agents[0])
+    if temperature != 0:
+        return None
+    try:
+        return cache.get_json(model, temperature, crew_fingerprint(crew))
+    except Exception as e:
+        report('warning', f"Warning: LLM cache unavailable: {e}")
+        return None
+
+
+def store_outputs(cache, crew, outputs):
+    if cache is None:
+        return
+    model, temperature = llm_identity(crew.agents[0])
+    if temperature != 0:
+        return
+    try:
+        cache.put_json(model, temperature, crew_fingerprint(crew), outputs)
+    except Exception as e:
+        report('warning', f"Warning: LLM cache unavailable: {e}")
+
+
+def cached_row(cache, sid, crew):
+    outputs = cached_outputs(cache, crew)
+    if outputs is None:
+        return None
+    return dict(zip(['SIS User ID'] + ASSESSMENT_COLUMNS, [sid] + outputs))
+
+
+def store_row(cache, crew, row):
+    if 'Error' not in row:
+        store_outputs(cache, crew, [row[column] for column in ASSESSMENT_COLUMNS])
+
+
+def record_usage(call, crew_output):
+    usage = crew_output.token_usage
+    call['prompt_tokens'] = usage.prompt_tokens
+    call['completion_tokens'] = usage.completion_tokens
+
+
+def assessment_llm(llm_config):
+    # One LLM for every agent, on the shared client (see llm_client.crew_llm),
+    # so crews get the same timeouts, backoff and circuit breaker as chat.
+    return crew_llm(
+        llm_config.get('model', DEFAULT_MODEL),
+        temperature=llm_config.get('temperature', 0.0),
+        max_tokens=llm_config.get('max_tokens'),
+    )
+
+
+@contextmanager
+def tracked_call(stage, crew, **labels):
+    # The circuit breaker lives in the HTTP transport; here a crew is only
+    # recorded (and refused once the budget is spent).
+    with get_telemetry().track(stage, llm_identity(crew.agents[0])[0], **labels) as call:
+        yield call
+
+
+def run_crew(crew, stage='student_assessment', **labels):
+    with tracked_call(stage, crew, **labels) as call:
+        crew_output = crew.kickoff()
+        record_usage(call, crew_output)
+    return crew_output
+
+
+async def run_crew_async(crew, stage='student_assessment', **labels):
+    with tracked_call(stage, crew, **labels) as call:
+        crew_output = await crew.kickoff_async()
+        record_usage(call, crew_output)
+    return crew_output
+
+
+def student_profiles(frames, student_ids):
+    for sid in student_ids:
+        yield sid, frames['co'].loc[sid].to_dict(), frames['po'].loc[sid].to_dict(), frames['io'].loc[sid].to_dict()
+
+
+def assess_students(frames, student_ids, max_rpm=DEFAULT_MAX_RPM, cache=None, parallel=True, llm=None):
+    agents = build_agents(max_rpm, llm)
+    assessments = []
+    for sid, co_data, po_data, io_data in student_profiles(frames, student_ids):
+        crew = build_crew(sid, co_data, po_data, io_data, agents, parallel)
+        row = cached_row(cache, sid, crew)
+        if row is None:
+            try:
+                row = assessment_row(sid, run_crew(crew, student=sid))
+            except BudgetExceeded as e:
+                row = assessment_row(sid, error=e)
+            except Exception as e:
+                report('warning', f"Warning: assessment failed for student {sid}: {e}")
+                row = assessment_row(sid, error=e)
+            store_row(cache, crew, row)
+        assessments.append(row)
+    return assessments
+
+
+async def assess_students_async(frames, student_ids, concurrency=DEFAULT_CONCURRENCY, max_rpm=DEFAULT_MAX_RPM, cache=None, parallel=True, llm=None):
+    # Many students' crews run at once, bounded by a semaphore and by one token
+    # bucket shared across every crew so the combined request rate stays under
+    # max_rpm. gather() keeps results in student order; a failing student only
+    # costs its own row.
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = AsyncTokenBucket(max_rpm)
+
+    async def assess(sid, co_data, po_data, io_data):
+        async with semaphore:
+            # Agents keep per-crew state, so each concurrent crew gets its own.
+            crew = build_crew(sid, co_data, po_data, io_data, build_agents(max_rpm, llm), parallel)
+            row = cached_row(cache, sid, crew)
+            if row is not None:
+                return row
+            await bucket.acquire(len(crew.tasks))
+            try:
+                row = assessment_row(sid, await run_crew_async(crew, student=sid))
+            except BudgetExceeded as e:
+                row = assessment_row(sid, error=e)
+            except Exception as e:
+                report('warning', f"Warning: assessment failed for student {sid}: {e}")
+                row = assessment_row(sid, error=e)
+            store_row(cache, crew, row)
+            return row
+
+    return await asyncio.gather(*(assess(*profile) for profile in student_profiles(frames, student_ids)))
+
+
+def build_batch_crew(batch_ids, frames, agents, parallel=True):
+    course_outcome_agent, program_outcome_agent, institutional_outcome_agent, overall_assessment_agent = agents
+    encoded = {level: level_table(frames[level], batch_ids, level) for level in LEVELS}
+    legends = {level: legend for level, (legend, _) in encoded.items()}
+    tables = {level: table for level, (_, table) in encoded.items()}
+    expected_output = "JSON object with one assessment per student row."
+    co_task = Task(
+        description=stable_prompt(legends['co'], f"Analyze course outcome data for each student in this table and summarize their strengths and weaknesses. {BATCH_INSTRUCTIONS}", tables['co']),
+        agent=course_outcome_agent,
+        async_execution=parallel,
+        expected_output=expected_output,
+        output_pydantic=BatchAssessment
+    )
+    po_task = Task(
+        description=stable_prompt(legends['po'], f"Analyze program outcome data for each student in this table and summarize their program-level capabilities. {BATCH_INSTRUCTIONS}", tables['po']),
+        agent=program_outcome_agent,
+        async_execution=parallel,
+        expected_output=expected_output,
+        output_pydantic=BatchAssessment
+    )
+    io_task = Task(
+        description=stable_prompt(legends['io'], f"Analyze institutional outcome data for each student in this table and summarize their attainment of institutional goals. {BATCH_INSTRUCTIONS}", tables['io']),
+        agent=institutional_outcome_agent,
+        async_execution=parallel,
+        expected_output=expected_output,
+        output_pydantic=BatchAssessment
+    )
+    overall_task = Task(
+        description=stable_prompt(
+            '\n\n'.join(legend for legend in legends.values() if legend),
+            f"Combine the CO, PO and IO tables into overall capability insights for each student. {BATCH_INSTRUCTIONS}",
+            '\n\n'.join(tables[level] for level in LEVELS)
+        ),
+        agent=overall_assessment_agent,
+        context=[co_task, po_task, io_task],
+        expected_output=expected_output,
+        output_pydantic=BatchAssessment
+    )
+    return Crew(
+        agents=agents,
+        tasks=[co_task, po_task, io_task, overall_task],
+        verbose=False
+    )
+
+
+def assess_students_batched(frames, student_ids, batch_size, token_budget=DEFAULT_TOKEN_BUDGET, max_rpm=DEFAULT_MAX_RPM, cache=None, parallel=True, llm=None):
+    agents = build_agents(max_rpm, llm)
+    assessments = []
+    for batch_ids in plan_batches(frames, student_ids, LEVELS, batch_size, token_budget):
+        crew = build_batch_crew(batch_ids, frames, agents, parallel)
+        outputs = cached_outputs(cache, crew)
+        error = None
+        if outputs is None:
+            try:
+                crew_output = run_crew(crew, stage='student_assessment_batch', student=','.join(map(str, batch_ids)))
+                outputs = [task_output.raw for task_output in crew_output.tasks_output]
+            except BudgetExceeded as e:
+                outputs, error = [], e
+            except Exception as e:
+                report('warning', f"Warning: batch assessment failed for students {batch_ids}: {e}")
+                outputs, error = [], e
+        rows = {sid: {'SIS User ID': sid} for sid in batch_ids}
+        missing = set()
+        for column, raw in zip(ASSESSMENT_COLUMNS, outputs):
+            try:
+                parsed = parse_batch_output(raw, batch_ids)
+            except ValueError as e:
+                report('warning', f"Warning: {column} for students {batch_ids}: {e}")
+                parsed, error = {}, e
+            missing.update(sid for sid in batch_ids if sid not in parsed)
+            for sid in batch_ids:
+                rows[sid][column] = parsed.get(sid, NO_ASSESSMENT)
+        if len(outputs) < len(ASSESSMENT_COLUMNS):
+            missing.update(batch_ids)
+        for sid in batch_ids:
+            for column in ASSESSMENT_COLUMNS:
+                rows[sid].setdefault(column, NO_ASSESSMENT)
+            if error is not None:
+                rows[sid]['Error'] = str(error)
+        if error is None and missing:
+            # A truncated or partial answer: the students it left out get their
+            # own crew, and the batch is not cached.
+            left_out = [sid for sid in batch_ids if sid in missing]
+            report('warning', f"Warning: batch answer left out students {left_out}; assessing them individually")
+            for row in assess_students(frames, left_out, max_rpm, cache, parallel, llm):
+                rows[row['SIS User ID']] = row
+        elif error is None:
+            store_outputs(cache, crew, outputs)
+        assessments.extend(rows[sid] for sid in batch_ids)
+    return assessments
+
+
+def compute_student_assessments(config, course_name, semester, section, frames, output_folder):
+    if any(frames.get(level) is None for level in LEVELS):
+        report('error', f"Error: Missing CO/PO/IO results for student assessments in {course_name}_{semester}_{section}")
+        return
+    student_ids = frames['co'].index.intersection(frames['po'].index).intersection(frames['io'].index)
+    if student_ids.empty:
+        report('error', f"Error: No common student IDs found for {course_name}_{semester}_{section}")
+        return
+    llm_config = config.get('llm', {})
+    configure_from_config(config)
+    concurrency = llm_config.get('concurrency', DEFAULT_CONCURRENCY)
+    max_rpm = llm_config.get('max_rpm', DEFAULT_MAX_RPM)
+    parallel = llm_config.get('parallel_tasks', True)
+    try:
+        cache = cache_from_config(config)
+    except Exception as e:
+        report('warning', f"Warning: LLM cache unavailable, assessing without it: {e}")
+        cache = None
+    llm = assessment_llm(llm_config)
+    buckets = None
+    # Opt-in: students whose (optionally quantized) scores match share one
+    # assessment, so near-identical students get the same text.
+    if llm_config.get('deduplicate_profiles', False):
+        buckets, frames = bucket_profiles(frames, student_ids, LEVELS, llm_config.get('profile_quantum'))
+        student_ids = frames['co'].index
+        saved = (len(buckets) - len(student_ids)) * len(ASSESSMENT_COLUMNS)
+        report('info', f"{len(buckets)} students in {course_name}_{semester}_{section} share {len(student_ids)} outcome profiles; {saved} LLM calls saved")
+    with get_telemetry().context(course=course_name, semester=semester, section=section):
+        batch_size = llm_config.get('batch_size', 0)
+        if batch_size > 1:
+            token_budget = llm_config.get('batch_token_budget', DEFAULT_TOKEN_BUDGET)
+            assessments = assess_students_batched(frames, student_ids, batch_size, token_budget, max_rpm, cache, parallel, llm)
+        elif concurrency > 1:
+            assessments = asyncio.run(assess_students_async(frames, student_ids, concurrency, max_rpm, cache, parallel, llm))
+        else:
+            assessments = assess_students(frames, student_ids, max_rpm, cache, parallel, llm)
+    if buckets is not None:
+        assessments = fan_out(buckets, assessments)
+    if cache is not None:
+        report('info', f"LLM cache for {course_name}_{semester}_{section}: {cache.hits} hits, {cache.misses} misses")
+    failed = sum(1 for row in assessments if 'Error' in row)
+    if failed:
+        report('warning', f"Warning: {failed} of {len(assessments)} student assessments failed in {course_name}_{semester}_{section}")
+    assessment_df = pd.DataFrame(assessments)
+    output_file = os.path.join(
+        output_folder,
+        f"{course_name}_{semester}_{section}_student_assessment.xlsx"
+    )
+    try:
+        assessment_df.to_excel(output_file, index=False)
+        report('success', f"Saved student assessments to {output_file}")
+    except Exception as e:
+        report('error', f"Error saving student assessments to {output_file}: {e}")
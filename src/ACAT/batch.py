@@ -0,0 +1,317 @@
+import argparse
+import copy
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from llm_telemetry import configure, get_telemetry, telemetry_from_config
+from incremental import Manifest, save_co_frame, load_co_frame
+from pipeline import DEFAULT_PROGRAM, load_mappings, run_section, rollup_section, export_section, section_stem, rollup_cohort, export_cohort
+from readers import load_config, read_outcomes, read_assignments, read_grades
+from reporting import capture_reports, forward, report
+from warehouse import warehouse_path
+
+# Headless counterpart of the dashboard's "Process Files" button. Streamlit,
+# plotly and crewai are never imported here; crewai is only loaded inside the
+# workers when the LLM stage is requested with --llm.
+
+
+def resolve_config_paths(config, base_dir):
+    config = copy.deepcopy(config)
+
+    def resolve(path):
+        return path if not path or os.path.isabs(path) else os.path.join(base_dir, path)
+
+    for course in config.get('courses', []):
+        course['outcomes_file'] = resolve(course.get('outcomes_file'))
+        for section_data in course.get('sections', []):
+            section_data['assignments_file'] = resolve(section_data.get('assignments_file'))
+            section_data['grades_file'] = resolve(section_data.get('grades_file'))
+    output = config.setdefault('output', {})
+    output.setdefault('state_folder', '.acat_state')
+    for key in ('excel_folder', 'database_folder', 'warehouse_file', 'state_folder', 'co_po_mapping_file', 'po_io_mapping_file'):
+        if key in output:
+            output[key] = resolve(output[key])
+    for level in output.get('extra_levels', []):
+        level['mapping_file'] = resolve(level.get('mapping_file'))
+    return config
+
+
+def iter_sections(config):
+    for course in config['courses']:
+        course_name = course.get('course_name')
+        semester = course.get('semester')
+        outcomes_file = course.get('outcomes_file')
+        if not course_name or not semester or not outcomes_file:
+            report('warning', f"Skipping course due to missing info: {course}")
+            continue
+        for section_data in course.get('sections', []):
+            if not section_data.get('section'):
+                report('warning', f"Skipping section with missing section name in {course_name}.")
+                continue
+            yield course_name, semester, outcomes_file, section_data
+
+
+def section_telemetry(config, budget):
+    # In-process sections share the Telemetry run_batch configured, so its
+    # ceilings count across sections. A worker process gets its own, capped
+    # at the share of the remaining budget it was handed.
+    if budget is None:
+        return get_telemetry()
+    metrics_file = config.get('llm', {}).get('telemetry', {}).get('metrics_file', 'llm_metrics.jsonl')
+    return configure(metrics_file=metrics_file, **budget)
+
+
+def process_section(config, course_name, semester, outcomes_file, section_data, engine, export=True, run_llm=False,
+                    stages=('co', 'rollup'), state_folder=None, budget=None):
+    section = section_data['section']
+    stem = section_stem(course_name, semester, section)
+    timings = {'section': stem, 'status': 'skipped'}
+    start = time.perf_counter()
+    if 'co' in stages:
+        outcomes = read_outcomes(outcomes_file)
+        if not outcomes:
+            report('warning', f"No outcomes found for course {course_name}, skipping.")
+            return timings
+        assignments_mapping = read_assignments(section_data.get('assignments_file', ''), outcomes)
+        final_outcomes = {outcome: assignments_mapping.get(outcome, []) for outcome in outcomes}
+        required_columns = set(assignment for criteria in final_outcomes.values() for assignment in criteria)
+        grades_file = section_data.get('grades_file')
+        if not grades_file:
+            report('warning', f"Grades file missing for section {section} of course {course_name}, skipping.")
+            return timings
+        student_data = read_grades(grades_file, required_columns=required_columns)
+        if not student_data:
+            report('warning', f"No student data found for section {section} of course {course_name}, skipping.")
+            return timings
+        timings['read'] = time.perf_counter() - start
+
+        mark = time.perf_counter()
+        frames = run_section(course_name, semester, section, final_outcomes, student_data, engine)
+        if state_folder:
+            save_co_frame(state_folder, stem, frames['co'])
+    else:
+        # Only the mappings or options changed: reuse the stored CO frame.
+        mark = time.perf_counter()
+        frames = rollup_section(load_co_frame(state_folder, stem), course_name, engine)
+    timings['compute'] = time.perf_counter() - mark
+    timings['stages'] = '+'.join(stages)
+
+    output = config.get('output', {})
+    excel_folder = output.get('excel_folder', 'output')
+    outputs = []
+    if export:
+        mark = time.perf_counter()
+        outputs += export_section(frames, course_name, semester, section, excel_folder, warehouse_path(config))
+        timings['export'] = time.perf_counter() - mark
+
+    if run_llm and frames.get('io') is not None:
+        from assessments import compute_student_assessments
+        telemetry = section_telemetry(config, budget)
+        tokens, cost = telemetry.total_tokens, telemetry.total_cost
+        mark = time.perf_counter()
+        compute_student_assessments(config, course_name, semester, section, frames, excel_folder)
+        timings['llm'] = time.perf_counter() - mark
+        timings['llm_tokens'] = telemetry.total_tokens - tokens
+        timings['llm_cost'] = telemetry.total_cost - cost
+        assessment_file = os.path.join(excel_folder, f"{stem}_student_assessment.xlsx")
+        if os.path.exists(assessment_file):
+            outputs.append(assessment_file)
+
+    timings['outputs'] = outputs
+    timings['students'] = len(frames['co'])
+    timings['status'] = 'ok'
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+
+def process_section_collecting(*args):
+    # Worker-process entry point. The parent's report capture is a ContextVar
+    # and does not reach other processes, so the section's messages are
+    # collected here and returned as (timings, messages, error) for run_batch
+    # to forward.
+    messages = []
+    with capture_reports(lambda level, message: messages.append((level, message))):
+        try:
+            return process_section(*args), messages, None
+        except Exception as e:
+            return None, messages, str(e)
+
+
+def state_folder_for(config):
+    return config.get('output', {}).get('state_folder', '.acat_state')
+
+
+def run_batch(config, workers=None, export=True, run_llm=False, incremental=True, progress=None, cancelled=None):
+    # progress(stem, status, timings) is called as sections are planned, start
+    # and finish; cancelled() is polled between sections and, once true, no
+    # further section is started (see jobs.JobQueue).
+    progress = progress or (lambda stem, status, timings=None: None)
+    cancelled = cancelled or (lambda: False)
+    workers = workers or os.cpu_count() or 1
+    engine = load_mappings(config)
+    state_folder = state_folder_for(config)
+    manifest = Manifest(state_folder)
+    options = {'export': export, 'llm': run_llm, 'levels': engine.level_names}
+    results = []
+    pending = []
+    sections = []
+    for course_name, semester, outcomes_file, section_data in iter_sections(config):
+        sections.append((course_name, semester, section_data['section']))
+        stem = section_stem(*sections[-1])
+        digests = manifest.section_digests(config, outcomes_file, section_data, options)
+        stages = manifest.stale_stages(stem, digests) if incremental else ('co', 'rollup')
+        if not stages:
+            results.append({'section': stem, 'status': 'current'})
+            progress(stem, 'current', results[-1])
+            continue
+        job = (config, course_name, semester, outcomes_file, section_data, engine, export, run_llm, stages, state_folder)
+        pending.append((stem, digests, job))
+        progress(stem, 'pending')
+
+    # Telemetry and its llm.telemetry ceilings are set up once per run. No
+    # section starts once they are reached, and sections running in worker
+    # processes are each handed a share of what is left, so together they
+    # stay within the ceilings.
+    telemetry = telemetry_from_config(config) if run_llm else None
+    limits = {'max_tokens': telemetry.max_tokens, 'max_cost_usd': telemetry.max_cost_usd} if telemetry else {}
+    limits = {key: value for key, value in limits.items() if value is not None}
+    spent = {'max_tokens': 0, 'max_cost_usd': 0.0}
+    reserved = {}
+
+    def over_budget():
+        # Shares handed to running sections count as spent until they finish.
+        return any(spent[key] + sum(share[key] for share in reserved.values()) >= limit for key, limit in limits.items())
+
+    def budget_share(stem, running):
+        if workers == 1 or not limits:
+            return None
+        free = workers - running
+        share = {}
+        for key, limit in limits.items():
+            left = max(limit - spent[key] - sum(other[key] for other in reserved.values()), 0)
+            share[key] = left // free if key == 'max_tokens' else left / free
+        reserved[stem] = share
+        return share
+
+    def skip(stem, status):
+        results.append({'section': stem, 'status': status})
+        progress(stem, status, results[-1])
+
+    def finish(stem, digests, timings):
+        results.append(timings)
+        progress(stem, timings['status'], timings)
+        spent['max_tokens'] += timings.get('llm_tokens', 0)
+        spent['max_cost_usd'] += timings.get('llm_cost', 0.0)
+        if timings['status'] == 'ok':
+            manifest.record(stem, digests, timings.get('outputs', []))
+
+    def startable(stem):
+        if cancelled():
+            skip(stem, 'cancelled')
+            return False
+        if run_llm and over_budget():
+            report('warning', f"LLM budget reached, skipping {stem}")
+            skip(stem, 'skipped')
+            return False
+        progress(stem, 'running')
+        return True
+
+    try:
+        if workers == 1:
+            for stem, digests, job in pending:
+                if not startable(stem):
+                    continue
+                try:
+                    finish(stem, digests, process_section(*job))
+                except Exception as e:
+                    report('error', f"Error processing {stem}: {e}")
+                    skip(stem, 'failed')
+        else:
+            # Sections are submitted as workers free up, so cancellation and
+            # the budget are checked before each one starts.
+            waiting = deque(pending)
+            running = {}
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                while waiting or running:
+                    while waiting and len(running) < workers:
+                        stem, digests, job = waiting.popleft()
+                        if startable(stem):
+                            running[pool.submit(process_section_collecting, *job, budget_share(stem, len(running)))] = (stem, digests)
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stem, digests = running.pop(future)
+                        reserved.pop(stem, None)
+                        try:
+                            timings, messages, error = future.result()
+                        except Exception as e:
+                            # The worker itself died (e.g. BrokenProcessPool).
+                            timings, messages, error = None, [], str(e)
+                        for level, message in messages:
+                            forward(level, message)
+                        if error is None:
+                            finish(stem, digests, timings)
+                        else:
+                            report('error', f"Error processing {stem}: {error}")
+                            skip(stem, 'failed')
+    finally:
+        # Sections that finished are recorded even if the run stops early.
+        manifest.save()
+    if export and any(timings['status'] == 'ok' for timings in results):
+        export_cohort_rollup(config, engine, state_folder, sections)
+    return sorted(results, key=lambda timings: timings['section'])
+
+
+def export_cohort_rollup(config, engine, state_folder, sections):
+    # Program and institution outcomes across every course of the config,
+    # pooled from the CO frame each section stored, including sections that
+    # were current and not recomputed in this run.
+    co_frames = {}
+    for key in sections:
+        try:
+            co_frames[key] = load_co_frame(state_folder, section_stem(*key))
+        except OSError:
+            continue
+    frames = rollup_cohort(engine, co_frames, config.get('program', DEFAULT_PROGRAM))
+    if frames:
+        export_cohort(frames, config.get('output', {}).get('excel_folder', 'output'))
+
+
+def print_summary(results, elapsed):
+    columns = ['read', 'compute', 'export', 'llm', 'total']
+    print(f"\n{'Section':<24}{'Status':<9}{'Stages':<11}{'Students':>9}" + ''.join(f"{col:>10}" for col in columns))
+    for timings in results:
+        cells = ''.join(f"{timings[col]:>9.2f}s" if col in timings else f"{'-':>10}" for col in columns)
+        print(f"{timings['section']:<24}{timings['status']:<9}{timings.get('stages', '-'):<11}{timings.get('students', 0):>9}{cells}")
+    ok = sum(1 for timings in results if timings['status'] == 'ok')
+    current = sum(1 for timings in results if timings['status'] == 'current')
+    print(f"\nProcessed {ok}/{len(results)} sections ({current} already up to date) in {elapsed:.2f}s wall clock")
+    if any('llm_tokens' in timings for timings in results):
+        tokens = sum(timings.get('llm_tokens', 0) for timings in results)
+        cost = sum(timings.get('llm_cost', 0.0) for timings in results)
+        print(f"LLM usage: {tokens} tokens, ${cost:.4f} estimated cost (details in llm_metrics.jsonl)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process every course and section in an ACAT config without the dashboard.")
+    parser.add_argument('config', nargs='?', default='acat_config.json', help="Path to acat_config.json")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="Number of worker processes (1 runs in-process)")
+    parser.add_argument('--no-export', action='store_true', help="Compute results without writing Excel/SQLite outputs")
+    parser.add_argument('--llm', action='store_true', help="Also run the crewai student assessment stage")
+    parser.add_argument('--full', action='store_true', help="Recompute every section even if its inputs are unchanged")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not config:
+        return 1
+    config = resolve_config_paths(config, os.path.dirname(os.path.abspath(args.config)))
+    start = time.perf_counter()
+    results = run_batch(config, workers=args.workers, export=not args.no_export, run_llm=args.llm, incremental=not args.full)
+    print_summary(results, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
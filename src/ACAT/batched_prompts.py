@@ -0,0 +1,65 @@
+import json
+import re
+from pydantic import BaseModel, ValidationError
+from prompt_encoding import encode_frame
+from token_estimate import estimate_tokens
+from warehouse import student_key
+
+# Packs several students into one tabular prompt per agent, so the fixed
+# role/backstory/instruction overhead is paid once per batch rather than once
+# per student, and splits the agent's JSON answer back into per-student text.
+
+BATCH_INSTRUCTIONS = (
+    "Return only JSON of the form "
+    '{"assessments": [{"student": "<SIS User ID>", "assessment": "<text>"}]} '
+    "with exactly one entry for every student row in the table."
+)
+DEFAULT_TOKEN_BUDGET = 6000
+OUTPUT_TOKENS_PER_STUDENT = 200
+
+
+class StudentAssessment(BaseModel):
+    student: str
+    assessment: str
+
+
+class BatchAssessment(BaseModel):
+    assessments: list[StudentAssessment]
+
+
+def level_table(frame, student_ids, level):
+    # (legend, table) in the compact prompt encoding, e.g. "SIS User ID|CO1|CO2".
+    return encode_frame(frame, student_ids, level.upper())
+
+
+def plan_batches(frames, student_ids, levels, batch_size, token_budget=DEFAULT_TOKEN_BUDGET):
+    # The overall task carries every level's table, so it sets the prompt size.
+    # A batch grows until it reaches batch_size or its prompt plus expected
+    # output would exceed token_budget; a single student always forms a batch.
+    batches, current = [], []
+    for sid in student_ids:
+        candidate = current + [sid]
+        prompt_tokens = sum(estimate_tokens(''.join(level_table(frames[level], candidate, level))) for level in levels)
+        tokens = prompt_tokens + estimate_tokens(BATCH_INSTRUCTIONS) + OUTPUT_TOKENS_PER_STUDENT * len(candidate)
+        if current and (len(candidate) > batch_size or tokens > token_budget):
+            batches.append(current)
+            candidate = [sid]
+        current = candidate
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_output(raw, student_ids):
+    # Models sometimes wrap the JSON in prose or code fences; take the outermost object.
+    match = re.search(r'\{.*\}', raw or '', re.DOTALL)
+    if match is None:
+        raise ValueError("no JSON object in batch output")
+    try:
+        batch = BatchAssessment.model_validate_json(match.group(0))
+    except (ValidationError, json.JSONDecodeError) as e:
+        raise ValueError(f"batch output does not match schema: {e}") from e
+    # Students the model left out are omitted, so callers can tell a partial
+    # answer from a complete one.
+    by_student = {item.student.strip(): item.assessment for item in batch.assessments}
+    return {sid: by_student[student_key(sid)] for sid in student_ids if by_student.get(student_key(sid))}
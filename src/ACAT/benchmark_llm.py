@@ -0,0 +1,143 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from llm_telemetry import configure, percentile
+from mock_llm_server import MockLLMServer
+
+# Measures the LLM stage offline against mock_llm_server, so concurrency,
+# batching, deduplication and caching changes can be compared without network
+# access or API spend:
+#
+#   python benchmark_llm.py --students 60 --latency-ms 300 --error-rate 0.02
+#
+# Each scenario is an "llm" config overlay for compute_student_assessments;
+# "chat" drives chat_with_gpt instead.
+
+BASE_LLM_CONFIG = {'deduplicate_profiles': False, 'cache': {'enabled': False}}
+
+SCENARIOS = {
+    'sequential': {'concurrency': 1},
+    'concurrent': {'concurrency': 8},
+    'batched': {'batch_size': 10},
+    'deduplicated': {'concurrency': 8, 'deduplicate_profiles': True},
+    'cached': {'concurrency': 8, 'cache': {'enabled': True}},
+}
+
+OUTCOME_COUNTS = {'co': 5, 'po': 12, 'io': 6}
+
+
+def synthetic_frames(students, distinct_profiles=0, seed=0):
+    # Likert scores (1-4) per level; with distinct_profiles set, students are
+    # drawn from that many archetypes so profile deduplication has work to do.
+    rng = np.random.default_rng(seed)
+    ids = pd.Index([f"{1000 + i}" for i in range(students)], name='SIS User ID')
+    rows = distinct_profiles or students
+    archetype = rng.integers(0, rows, students) if distinct_profiles else np.arange(students)
+    frames = {}
+    for level, count in OUTCOME_COUNTS.items():
+        scores = rng.integers(1, 5, size=(rows, count)).astype(float)[archetype]
+        frames[level] = pd.DataFrame(scores, index=ids, columns=[f"{level.upper()}{i + 1}" for i in range(count)])
+    return frames
+
+
+def point_at(server):
+    # crewai (litellm) and the OpenAI SDK both read these.
+    os.environ['OPENAI_API_KEY'] = 'mock'
+    os.environ['OPENAI_BASE_URL'] = server.url
+    os.environ['OPENAI_API_BASE'] = server.url
+
+
+def run_assessment_scenario(name, overlay, frames, output_folder):
+    from assessments import compute_student_assessments
+    llm_config = {**BASE_LLM_CONFIG, **overlay}
+    if llm_config['cache'].get('enabled'):
+        llm_config['cache'] = {**llm_config['cache'], 'path': os.path.join(output_folder, f"{name}_cache.db")}
+        # Warm the cache, then measure the repeat run.
+        compute_student_assessments({'llm': llm_config}, 'BENCH', 'MOCK', f"{name}-warm", frames, output_folder)
+    start = time.perf_counter()
+    compute_student_assessments({'llm': llm_config}, 'BENCH', 'MOCK', name, frames, output_folder)
+    return time.perf_counter() - start
+
+
+def run_chat_scenario(server, turns):
+    from chat_with_gpt import chat_with_gpt
+    from llm_client import openai_client
+    client = openai_client(api_key='mock', base_url=server.url)
+    messages = [{"role": "system", "content": "You are an expert in assessing student learning capabilities based on a likert scale."}]
+    start = time.perf_counter()
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Question {turn}: summarise the student's strengths."})
+        messages.append({"role": "assistant", "content": chat_with_gpt(client, messages)})
+    return time.perf_counter() - start
+
+
+def run_benchmark(scenarios, students=40, distinct_profiles=0, latency=0.2, jitter=0.05, completion_tokens=120,
+                  error_rate=0.0, chat_turns=10, seed=0):
+    frames = synthetic_frames(students, distinct_profiles, seed)
+    results = []
+    with MockLLMServer(latency=latency, jitter=jitter, completion_tokens=completion_tokens,
+                       error_rate=error_rate, seed=seed) as server, tempfile.TemporaryDirectory() as output_folder:
+        point_at(server)
+        for name in scenarios:
+            telemetry = configure()
+            server.reset_stats()
+            if name == 'chat':
+                elapsed, units = run_chat_scenario(server, chat_turns), chat_turns
+            else:
+                elapsed, units = run_assessment_scenario(name, SCENARIOS[name], frames, output_folder), students
+            # Only the measured run's calls: the cached scenario's warm-up is
+            # tagged with its own section label.
+            latencies = [record['latency'] for record in telemetry.records if record.get('section') != f"{name}-warm"]
+            served = server.stats()
+            results.append({
+                'scenario': name,
+                'units': units,
+                'seconds': elapsed,
+                'throughput': units / elapsed if elapsed else 0.0,
+                'calls': len(latencies),
+                'p50': percentile(latencies, 0.50),
+                'p99': percentile(latencies, 0.99),
+                **served,
+            })
+    return results
+
+
+def print_results(results):
+    print(f"\n{'Scenario':<14}{'Units':>6}{'Seconds':>9}{'Units/s':>9}{'Calls':>7}{'p50':>8}{'p99':>8}"
+          f"{'Requests':>10}{'Errors':>8}{'Tokens':>9}")
+    for result in results:
+        tokens = result['prompt_tokens'] + result['completion_tokens']
+        print(f"{result['scenario']:<14}{result['units']:>6}{result['seconds']:>8.2f}s{result['throughput']:>9.2f}"
+              f"{result['calls']:>7}{result['p50']:>7.2f}s{result['p99']:>7.2f}s{result['requests']:>10}"
+              f"{result['errors']:>8}{tokens:>9}")
+    print("\nUnits are students (chat: turns); calls are whole crews or chat turns as seen by the client;"
+          " requests and tokens are counted by the mock server.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM stages against a local mock server.")
+    parser.add_argument('scenarios', nargs='*', default=[*SCENARIOS, 'chat'], help=f"Any of: {', '.join([*SCENARIOS, 'chat'])}")
+    parser.add_argument('--students', type=int, default=40)
+    parser.add_argument('--distinct-profiles', type=int, default=0, help="Draw students from this many outcome profiles (0: all distinct)")
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--completion-tokens', type=int, default=120)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--chat-turns', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS and name != 'chat']
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    results = run_benchmark(args.scenarios, args.students, args.distinct_profiles, args.latency_ms / 1000, args.jitter_ms / 1000,
+                            args.completion_tokens, args.error_rate, args.chat_turns, args.seed)
+    print_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+from token_estimate import estimate_tokens
+
+# Keeps a chat session's prompt under a token budget. Pinned messages (the
+# system prompt and any inserted student-outcomes block) are always sent; the
+# oldest other turns are dropped once the budget is exceeded, or folded into a
+# running summary when a summarizer is supplied.
+
+DEFAULT_CONTEXT_TOKENS = 8000
+MESSAGE_OVERHEAD_TOKENS = 4
+# Once over budget, evict down to this fraction of it, so the summarizer runs
+# every few turns rather than on every turn.
+LOW_WATER = 0.75
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def message_tokens(message):
+    return estimate_tokens(message.get('content') or '') + MESSAGE_OVERHEAD_TOKENS
+
+
+class ConversationWindow:
+    def __init__(self, system_prompt, token_budget=DEFAULT_CONTEXT_TOKENS, summarizer=None, keep_recent=2):
+        # summarizer(previous_summary, dropped_messages) -> new summary text.
+        # keep_recent turns are never dropped, so the latest question and its
+        # answer always reach the model even if they alone exceed the budget.
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.keep_recent = keep_recent
+        self.entries = [{'message': {"role": "system", "content": system_prompt}, 'pinned': True}]
+        self.summary = None
+        self.dropped = 0
+
+    def add(self, role, content, pinned=False):
+        self.entries.append({'message': {"role": role, "content": content}, 'pinned': pinned})
+        self._fit()
+
+    def pin(self, name, role, content):
+        # A named pinned message replaces its previous version, so inserting the
+        # student outcomes twice does not pay for them twice.
+        self.entries = [entry for entry in self.entries if entry.get('name') != name]
+        self.entries.append({'message': {"role": role, "content": content}, 'pinned': True, 'name': name})
+        self._fit()
+
+    def messages(self):
+        # Conversation order is kept; the summary of evicted turns follows the
+        # system prompt.
+        messages = [entry['message'] for entry in self.entries]
+        if self.summary:
+            messages.insert(1, {"role": "system", "content": SUMMARY_PREFIX + self.summary})
+        return messages
+
+    def tokens(self):
+        return sum(message_tokens(message) for message in self.messages())
+
+    def _fit(self):
+        evicted = []
+        if self.tokens() <= self.token_budget:
+            return
+        while self.tokens() > self.token_budget * LOW_WATER:
+            unpinned = [index for index, entry in enumerate(self.entries) if not entry['pinned']]
+            if len(unpinned) <= self.keep_recent:
+                break
+            evicted.append(self.entries.pop(unpinned[0])['message'])
+            self.dropped += 1
+        if evicted and self.summarizer is not None:
+            # If the new summary itself overflows, the next add() evicts and
+            # re-summarizes; the summarizer is asked to stay short.
+            self.summary = self.summarizer(self.summary, evicted)
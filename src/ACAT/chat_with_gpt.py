@@ -1,25 +1,131 @@
+import argparse
 import os
 import pandas as pd
-from openai import OpenAI
 from openai.types.chat import ChatCompletionMessageParam
-from student_outcomes import extract_student_outcomes_for_all_courses
+from student_outcomes import extract_student_outcomes_for_all_courses, outcomes_index
+from chat_context import ConversationWindow, DEFAULT_CONTEXT_TOKENS
+from llm_cache import LLMCache
+from llm_client import hedged, openai_client
+from llm_telemetry import configure, get_telemetry
+from outcome_retrieval import OutcomeRetriever
+from prompt_encoding import encode_courses, stable_prompt
 
 
-def chat_with_gpt(client, messages: list[ChatCompletionMessageParam]):
+MODEL = "gpt-4.1"
+# Outcome descriptions in the student-outcomes legend are cut to this many words.
+LEGEND_WORDS = 12
+
+SYSTEM_PROMPT = "You are an expert in assessing student learning capabilities based on a likert scale."
+SUMMARY_PROMPT = (
+    "Summarize this conversation about a student's learning outcomes in under 150 words. "
+    "Keep every score, strength, weakness and conclusion that was mentioned."
+)
+
+
+def cached_reply(cache, temperature, messages):
+    # Only deterministic calls (temperature 0, such as the summarizer) are
+    # cached: a free-form reply is one sample and should not be replayed for
+    # every later identical question. A broken cache counts as a miss.
+    if cache is None or temperature != 0:
+        return None
+    try:
+        return cache.get(MODEL, temperature, messages)
+    except Exception as e:
+        print(f"⚠️ Response cache unavailable: {e}")
+        return None
+
+
+def store_reply(cache, temperature, messages, content):
+    if cache is None or temperature != 0:
+        return
+    try:
+        cache.put(MODEL, temperature, messages, content)
+    except Exception as e:
+        print(f"⚠️ Response cache unavailable: {e}")
+
+
+def chat_with_gpt(client, messages: list[ChatCompletionMessageParam], cache: LLMCache | None = None, stage="chat", temperature=None):
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1",
-            messages=messages
-        )
-        return response.choices[0].message.content
+        cached = cached_reply(cache, temperature, messages)
+        if cached is not None:
+            return cached
+        options = {} if temperature is None else {"temperature": temperature}
+        with get_telemetry().track(stage, MODEL) as call:
+            response = hedged(lambda: client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                **options
+            ))
+            if response.usage is not None:
+                call['prompt_tokens'] = response.usage.prompt_tokens
+                call['completion_tokens'] = response.usage.completion_tokens
+        content = response.choices[0].message.content
+        store_reply(cache, temperature, messages, content)
+        return content
     except Exception as e:
         return f"⚠️ Error: {e}"
 
 
+def stream_chat_with_gpt(client, messages: list[ChatCompletionMessageParam], cache: LLMCache | None = None, on_token=None, stage="chat", temperature=None):
+    # Hands each piece of the answer to on_token as it arrives (prints by
+    # default) and returns the full text once the stream ends.
+    on_token = on_token or (lambda text: print(text, end="", flush=True))
+    parts = []
+    try:
+        cached = cached_reply(cache, temperature, messages)
+        if cached is not None:
+            on_token(cached)
+            return cached
+        options = {} if temperature is None else {"temperature": temperature}
+        with get_telemetry().track(stage, MODEL) as call:
+            stream = client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                **options
+            )
+            for chunk in stream:
+                if chunk.usage is not None:
+                    call['prompt_tokens'] = chunk.usage.prompt_tokens
+                    call['completion_tokens'] = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    on_token(chunk.choices[0].delta.content)
+        content = "".join(parts)
+        store_reply(cache, temperature, messages, content)
+        return content
+    except Exception as e:
+        error = f"⚠️ Error: {e}"
+        on_token(f"\n{error}" if parts else error)
+        return error
+
+
+def summarizer_for(client, cache: LLMCache | None = None):
+    def summarize(summary, turns):
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in turns)
+        if summary:
+            transcript = f"Earlier summary: {summary}\n{transcript}"
+        result = chat_with_gpt(client, [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript}
+        ], cache, stage="chat_summary", temperature=0)
+        # On failure keep the previous summary; the evicted turns are lost.
+        return summary if result.startswith("⚠️ Error") else result
+    return summarize
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Chat with GPT about student outcomes.")
+    parser.add_argument("--no-stream", action="store_true", help="Wait for each full answer instead of streaming it")
+    parser.add_argument("--context-tokens", type=int, default=DEFAULT_CONTEXT_TOKENS, help="Token budget for the prompt sent each turn")
+    parser.add_argument("--no-summary", action="store_true", help="Drop old turns instead of summarizing them")
+    parser.add_argument("--no-retrieval", action="store_true", help="Do not attach locally retrieved outcome rows to questions")
+    args = parser.parse_args()
+
     api_key = os.getenv("OPENAI_API_KEY") or input("Please enter your OpenAI API key: ").strip()
     try:
-        client = OpenAI(api_key=api_key)
+        client = openai_client(api_key=api_key)
         _ = client.models.list()
         print("✅ Successfully connected to OpenAI API.")
     except Exception as e:
@@ -29,32 +135,60 @@ def main():
     # 🔹 Load student outcomes but don't send yet
     student_outcomes = extract_student_outcomes_for_all_courses()
     print("📁 Student outcomes loaded. Type 'show student' anytime to insert it into the chat.")
+    # Cohort questions are answered from the local outcomes index first; only
+    # the matching rows are attached to the question sent to the model.
+    retriever = None if args.no_retrieval else OutcomeRetriever(outcomes_index())
 
-    messages: list[ChatCompletionMessageParam] = [
-        {"role": "system", "content": "You are an expert in assessing student learning capabilities based on a likert scale."}
-    ]
-
+    # Only summaries are cached; answers to the user are always fresh.
+    cache = LLMCache()
+    telemetry = configure(metrics_file="llm_metrics.jsonl")
+    # The system prompt and the student-outcomes block are pinned; older turns
+    # are summarized (or dropped) to stay within the token budget.
+    window = ConversationWindow(
+        SYSTEM_PROMPT,
+        token_budget=args.context_tokens,
+        summarizer=None if args.no_summary else summarizer_for(client, cache)
+    )
     print("\n🔹 ChatGPT Terminal Chat (type 'exit' to quit)")
 
     while True:
         user_input = input("\n🧑 You: ").strip()
 
         if user_input.lower() in ["exit", "quit"]:
+            stats = cache.stats()
+            print(f"🗄️ Summary cache: {stats['hits']} hits, {stats['misses']} misses")
+            print(f"🧠 Context: {window.tokens()} tokens in the last prompt, {window.dropped} old messages summarized or dropped")
+            for stage, metrics in telemetry.summary().items():
+                print(f"📊 {stage}: {metrics['calls']} calls, {metrics['prompt_tokens'] + metrics['completion_tokens']} tokens, "
+                      f"${metrics['cost_usd']:.4f}, p95 latency {metrics['latency_p95']:.2f}s")
             print("👋 Goodbye!")
             break
 
         # ✅ Special trigger to show student outcomes
         if user_input.lower() in ["show student", "student", "send student"]:
-            formatted = (
-                f"Here is the Likert scale outcome dictionary for an anonymouse student:\n{student_outcomes}\n\n"
-                f"Please Build a learner model of the students capability. Comment on the student's strengths and weaknesses."
+            legend, table = encode_courses(student_outcomes, max_words=LEGEND_WORDS)
+            formatted = stable_prompt(
+                legend,
+                "Here is the Likert scale outcome table for an anonymous student. "
+                "Please build a learner model of the student's capability. Comment on the student's strengths and weaknesses.",
+                table
             )
-            messages.append({"role": "user", "content": formatted})
+            window.pin("student_outcomes", "user", formatted)
         else:
-            messages.append({"role": "user", "content": user_input})
+            context = retriever.retrieve(user_input) if retriever is not None else ""
+            if context:
+                print(f"🔎 Attached {len(context.splitlines()) - 1} lines of locally retrieved data.")
+            window.add("user", f"{user_input}\n\n{context}" if context else user_input)
 
-        response = chat_with_gpt(client, messages)
-        print(f"\n🤖 ChatGPT: {response}")
+        if args.no_stream:
+            response = chat_with_gpt(client, window.messages())
+            print(f"\n🤖 ChatGPT: {response}")
+        else:
+            print("\n🤖 ChatGPT: ", end="", flush=True)
+            response = stream_chat_with_gpt(client, window.messages())
+            print()
+        if not response.startswith("⚠️ Error"):
+            window.add("assistant", response)
 
 
 if __name__ == "__main__":
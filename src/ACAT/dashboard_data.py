@@ -0,0 +1,145 @@
+import glob
+import os
+import pandas as pd
+import streamlit as st
+from outcomes_index import RESULTS_SUFFIX, parse_results_name
+from readers import safe_read_excel
+from warehouse import Warehouse, student_key
+
+# Data layer for the dashboard. Streamlit re-runs the whole script on every
+# widget change; here each results workbook is parsed once per (path, mtime,
+# size) fingerprint and the per-level catalog is rebuilt only when the folder's
+# fingerprint changes, so a filter change re-renders from memory.
+
+ASSESSMENT_SUFFIX = '_student_assessment.xlsx'
+LEVEL_TABS = ('co', 'po', 'io', 'student_assessment')
+FACT_INDEX = ['level', 'course', 'semester', 'section']
+FACT_COLUMNS = FACT_INDEX + ['student', 'outcome', 'score']
+
+
+def describe_file(path):
+    name = os.path.basename(path)
+    if name.endswith(ASSESSMENT_SUFFIX):
+        course, semester, section = (name[:-len(ASSESSMENT_SUFFIX)].split('_') + [None, None])[:3]
+        info = {'course': course, 'semester': semester, 'section': section, 'level': 'student_assessment'}
+    elif name.endswith(RESULTS_SUFFIX):
+        info = parse_results_name(name)
+    else:
+        return None
+    return {'path': path, 'name': name, **info}
+
+
+def folder_fingerprint(folder):
+    fingerprint = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.xlsx'))):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def load_results_file(path, mtime_ns, size):
+    # mtime_ns and size are only part of the cache key.
+    return safe_read_excel(path)
+
+
+@st.cache_data(show_spinner="Loading results...", max_entries=8)
+def load_results(fingerprint):
+    catalog, frames = [], {}
+    for path, mtime_ns, size in fingerprint:
+        info = describe_file(path)
+        if info is None:
+            continue
+        df = load_results_file(path, mtime_ns, size)
+        if df is None:
+            continue
+        catalog.append(info)
+        frames[path] = df
+    catalog = pd.DataFrame(catalog, columns=['path', 'name', 'course', 'semester', 'section', 'level'])
+    outcome_columns = sorted({
+        str(col) for df in frames.values() for col in df.columns if str(col).startswith(('CO', 'PO', 'IO'))
+    })
+    return {'catalog': catalog, 'frames': frames, 'outcome_columns': outcome_columns}
+
+
+def dashboard_data(folder):
+    return load_results(folder_fingerprint(folder))
+
+
+def select_files(data, level=None, course="All", section="All", semester="All"):
+    catalog = data['catalog']
+    mask = pd.Series(True, index=catalog.index)
+    if level is not None:
+        mask &= catalog['level'] == level
+    for column, value in (('course', course), ('section', section), ('semester', semester)):
+        if value != "All":
+            mask &= catalog[column] == value
+    return {path: data['frames'][path] for path in catalog.loc[mask, 'path']}
+
+
+def filter_options(data, column, course="All"):
+    catalog = data['catalog']
+    if course != "All":
+        catalog = catalog[catalog['course'] == course]
+    return sorted(catalog[column].dropna().unique())
+
+
+def warehouse_signature(warehouse_file):
+    # WAL mode writes land in the -wal file until a checkpoint, so both count.
+    mtimes = [os.stat(path).st_mtime_ns for path in (warehouse_file, f"{warehouse_file}-wal") if os.path.exists(path)]
+    return max(mtimes) if mtimes else None
+
+
+def frame_facts(info, df):
+    # One results workbook in long format; the first column holds the SIS
+    # User ID and PO/IO files carry a Class Average row.
+    ids = df.columns[0]
+    df = df[df[ids].notna() & (df[ids] != 'Class Average')]
+    long_scores = df.melt(id_vars=ids, var_name='outcome', value_name='score').rename(columns={ids: 'student'})
+    long_scores['student'] = long_scores['student'].map(student_key)
+    long_scores['outcome'] = long_scores['outcome'].astype(str)
+    return long_scores.assign(**{column: info[column] for column in FACT_INDEX})
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_facts(fingerprint, warehouse_file=None, warehouse_mtime_ns=None):
+    # The warehouse's outcome_scores view is the fact table the processing step
+    # maintains; without a warehouse it is derived from the results workbooks.
+    # warehouse_mtime_ns is only part of the cache key.
+    if warehouse_file:
+        long_scores = Warehouse(warehouse_file).outcome_scores()
+    else:
+        data = load_results(fingerprint)
+        parts = [
+            frame_facts(info, data['frames'][info['path']])
+            for info in data['catalog'].to_dict(orient='records') if info['level'] in ('co', 'po', 'io')
+        ]
+        long_scores = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=FACT_COLUMNS)
+    facts = long_scores[FACT_COLUMNS].dropna(subset=['score'])
+    facts = facts.astype({column: 'category' for column in FACT_COLUMNS if column != 'score'})
+    facts['score'] = pd.to_numeric(facts['score'], errors='coerce')
+    return facts.set_index(FACT_INDEX).sort_index()
+
+
+def dashboard_facts(folder, warehouse_file=None):
+    if warehouse_file and not os.path.exists(warehouse_file):
+        warehouse_file = None
+    signature = warehouse_signature(warehouse_file) if warehouse_file else None
+    return load_facts(folder_fingerprint(folder), warehouse_file, signature)
+
+
+def query_facts(facts, level, course="All", section="All", semester="All", outcome="All", score_range=None):
+    # Index slice on (level, course, semester, section), then vectorized masks.
+    key = tuple(slice(None) if value == "All" else value for value in (level, course, semester, section))
+    try:
+        rows = facts.loc[key, :]
+    except KeyError:
+        return facts.iloc[0:0].reset_index()
+    if outcome != "All":
+        rows = rows[rows['outcome'] == outcome]
+    if score_range:
+        rows = rows[rows['score'].between(*score_range)]
+    return rows.reset_index()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Server-side aggregates for the dashboard charts. Each function reduces long
+# score rows (student, outcome, score, ...) to a handful of numbers per outcome
+# with vectorized pandas/NumPy, so what reaches the browser grows with the
+# number of outcomes and bins, not with the number of students.
+
+HISTOGRAM_BINS = 20
+# One bin per Likert level, 1 through 5; averaged PO/IO scores fall between.
+LIKERT_EDGES = np.arange(0.5, 6.0, 1.0)
+BOX_QUANTILES = [0.0, 0.25, 0.5, 0.75, 1.0]
+BAND_QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+SEARCH_LIMIT = 20
+
+
+def binned_histogram(rows, bins=HISTOGRAM_BINS, value='score', by='outcome', edges=None):
+    # Counts per (by, bin) over shared edges: the given ones (scores outside
+    # them are clipped into the end bins), or `bins` equal-width bins spanning
+    # every score.
+    scores = rows[value].to_numpy(dtype=float)
+    valid = ~np.isnan(scores)
+    if not valid.any():
+        return pd.DataFrame(columns=[by, 'bin_left', 'bin_right', 'count'])
+    if edges is None:
+        low, high = scores[valid].min(), scores[valid].max()
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        edges = np.linspace(low, high, bins + 1)
+    edges = np.asarray(edges, dtype=float)
+    bins = len(edges) - 1
+    # The top edge belongs to the last bin.
+    positions = np.clip(np.searchsorted(edges, scores[valid], side='right') - 1, 0, bins - 1)
+    counts = (
+        pd.DataFrame({by: rows[by].to_numpy()[valid], 'bin': positions})
+        .groupby([by, 'bin'], observed=True).size().rename('count').reset_index()
+    )
+    counts['bin_left'] = edges[counts['bin']]
+    counts['bin_right'] = edges[counts['bin'] + 1]
+    return counts[[by, 'bin_left', 'bin_right', 'count']]
+
+
+def wide_histogram(df, bins=HISTOGRAM_BINS, edges=None, id_column='SIS User ID'):
+    # binned_histogram for a wide results frame (one column per outcome). The
+    # student id column is numeric in some exports and is never a score.
+    numeric = df.drop(columns=id_column, errors='ignore').select_dtypes(include='number')
+    long_scores = numeric.melt(var_name='outcome', value_name='score')
+    return binned_histogram(long_scores, bins, edges=edges)
+
+
+def box_summary(rows, by='outcome'):
+    # Five-number summary, mean and count per outcome; enough to draw a box
+    # plot without sending the raw scores.
+    grouped = rows.groupby(by, observed=True, sort=False)['score']
+    summary = grouped.quantile(BOX_QUANTILES).unstack()
+    summary.columns = ['min', 'q1', 'median', 'q3', 'max']
+    summary['mean'] = grouped.mean()
+    summary['count'] = grouped.count()
+    return summary.reset_index()
+
+
+def percentile_bands(rows, group):
+    # 10/25/50/75/90th percentiles per (group, outcome), e.g. per course or
+    # section, for band charts.
+    grouped = rows.groupby([group, 'outcome'], observed=True, sort=False)['score']
+    bands = grouped.quantile(BAND_QUANTILES).unstack()
+    bands.columns = [f"p{int(q * 100)}" for q in BAND_QUANTILES]
+    bands['count'] = grouped.count()
+    return bands.reset_index()
+
+
+def find_students(rows, query, limit=SEARCH_LIMIT):
+    # Student ids containing the query, prefix matches first.
+    query = str(query).strip()
+    if not query:
+        return []
+    students = pd.Series(rows['student'].astype(str).unique())
+    matches = students[students.str.contains(query, regex=False)]
+    ranked = sorted(matches, key=lambda sid: (not sid.startswith(query), len(sid), sid))
+    return ranked[:limit]
+
+
+def student_profile(rows, student):
+    # One student's scores next to the cohort median and quartiles for the
+    # same outcomes.
+    cohort = box_summary(rows).set_index('outcome')[['q1', 'median', 'q3']]
+    mine = rows[rows['student'].astype(str) == str(student)]
+    profile = mine.groupby('outcome', observed=True, sort=False)['score'].mean().rename('score').to_frame()
+    return profile.join(cohort).reset_index()
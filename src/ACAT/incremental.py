@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import pickle
+from uploads import uploaded_digest
+
+MANIFEST_FILE = 'manifest.json'
+
+# Dependency graph for one config-driven run:
+#
+#   outcomes + assignments + grades files  ->  'co' stage (per section)
+#   'co' result + mapping files + options  ->  'rollup' stage (PO, IO, extra
+#                                              levels, export, LLM)
+#
+# A changed mapping file therefore only re-runs 'rollup', reusing the CO frame
+# that the last run stored next to the manifest. So does a deleted export
+# output: 'rollup' is what writes them.
+
+
+def digest(parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    def __init__(self, state_folder):
+        self.state_folder = state_folder
+        self.path = os.path.join(state_folder, MANIFEST_FILE)
+        self._file_digests = {}
+        try:
+            with open(self.path, 'r') as file:
+                self.sections = json.load(file).get('sections', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.sections = {}
+
+    def file_digest(self, path):
+        # Content hash, so re-saving an unchanged workbook does not trigger a rebuild.
+        # Memoised per run because every section shares the mapping files.
+        if not path:
+            return None
+        if path not in self._file_digests:
+            # An uploaded workbook replaces the file at its path for this run.
+            self._file_digests[path] = uploaded_digest(path)
+        if self._file_digests[path] is None:
+            try:
+                with open(path, 'rb') as file:
+                    self._file_digests[path] = hashlib.sha1(file.read()).hexdigest()
+            except OSError:
+                self._file_digests[path] = 'missing'
+        return self._file_digests[path]
+
+    def section_digests(self, config, outcomes_file, section_data, options):
+        output = config.get('output', {})
+        co_digest = digest([
+            self.file_digest(outcomes_file),
+            self.file_digest(section_data.get('assignments_file')),
+            self.file_digest(section_data.get('grades_file')),
+        ])
+        mapping_files = [output.get('co_po_mapping_file'), output.get('po_io_mapping_file')]
+        mapping_files += [level.get('mapping_file') for level in output.get('extra_levels', [])]
+        rollup_digest = digest([
+            co_digest,
+            [self.file_digest(path) for path in mapping_files],
+            output.get('extra_levels', []),
+            options,
+        ])
+        return {'co': co_digest, 'rollup': rollup_digest}
+
+    def stale_stages(self, stem, digests):
+        recorded = self.sections.get(stem, {})
+        if recorded.get('co') != digests['co'] or not os.path.exists(co_frame_path(self.state_folder, stem)):
+            return ('co', 'rollup')
+        if recorded.get('rollup') != digests['rollup']:
+            return ('rollup',)
+        if not all(os.path.exists(path) for path in recorded.get('outputs', [])):
+            return ('rollup',)
+        return ()
+
+    def record(self, stem, digests, outputs=()):
+        # outputs: the files the section's export wrote (workbooks, warehouse).
+        self.sections[stem] = {**digests, 'outputs': list(outputs)}
+
+    def save(self):
+        os.makedirs(self.state_folder, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump({'sections': self.sections}, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+def co_frame_path(state_folder, stem):
+    return os.path.join(state_folder, f"{stem}_co.pkl")
+
+
+def save_co_frame(state_folder, stem, co_df):
+    os.makedirs(state_folder, exist_ok=True)
+    with open(co_frame_path(state_folder, stem), 'wb') as file:
+        pickle.dump(co_df, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_co_frame(state_folder, stem):
+    with open(co_frame_path(state_folder, stem), 'rb') as file:
+        return pickle.load(file)
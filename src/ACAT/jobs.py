@@ -0,0 +1,204 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from batch import run_batch
+from reporting import capture_reports
+from uploads import use_uploads
+
+JOBS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.acat_jobs.db')
+ACTIVE = ('queued', 'running')
+# Section statuses that are final; anything else is still pending or running.
+FINISHED = ('ok', 'current', 'skipped', 'failed', 'cancelled')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    config TEXT NOT NULL,
+    options TEXT NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    host TEXT,
+    pid INTEGER,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS job_sections (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    status TEXT NOT NULL,
+    timings TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, section)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS job_messages (
+    job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+    created REAL NOT NULL,
+    level TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_messages_job ON job_messages (job_id, created);
+"""
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    # Processing runs submitted from the dashboard. Jobs execute one at a time
+    # (max_jobs) on a thread inside the server process; with workers > 1
+    # run_batch fans sections out to worker processes, whose messages come
+    # back with their results. Jobs with uploads always run their sections
+    # serially in this process, where the uploaded frames live. Job,
+    # per-section and message state live in SQLite, so any page, including
+    # one reloaded mid-run, can show progress, request cancellation and pick
+    # up the results. Cancellation takes effect between sections: the section
+    # in flight runs to completion.
+
+    def __init__(self, db_path=JOBS_FILE, max_jobs=1):
+        self.db_path = db_path
+        self.pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix='acat-job')
+        self.host = socket.gethostname()
+        with self.transaction() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for column, kind in (('host', 'TEXT'), ('pid', 'INTEGER')):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {kind}')
+            # Jobs whose server process on this host has exited will never
+            # finish. Jobs of other live servers sharing the file are left alone.
+            active = conn.execute("SELECT id, host, pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+            orphaned = [row['id'] for row in active
+                        if row['pid'] is None or (row['host'] == self.host and not process_alive(row['pid']))]
+            conn.executemany("UPDATE jobs SET status = 'interrupted', finished = ? WHERE id = ?",
+                             [(time.time(), job_id) for job_id in orphaned])
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, config, workers=1, export=True, run_llm=False, incremental=True, uploads=None):
+        # uploads: an uploads.UploadedWorkbooks kept in memory for this job
+        # only. They are visible to this thread's context alone, so the run
+        # stays in-process.
+        job_id = uuid.uuid4().hex[:12]
+        if uploads:
+            workers = 1
+        options = {'workers': workers, 'export': export, 'run_llm': run_llm, 'incremental': incremental,
+                   'uploads': uploads.names() if uploads else []}
+        with self.transaction() as conn:
+            conn.execute('INSERT INTO jobs (id, status, config, options, host, pid, created) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (job_id, 'queued', json.dumps(config), json.dumps(options), self.host, os.getpid(), time.time()))
+        self.pool.submit(self._run, job_id, config, options, uploads)
+        return job_id
+
+    def cancel(self, job_id):
+        with self.transaction() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')", (job_id,))
+
+    def cancel_requested(self, job_id):
+        with self.transaction() as conn:
+            row = conn.execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def _set_status(self, job_id, status, **fields):
+        columns = ''.join(f", {column} = ?" for column in fields)
+        with self.transaction() as conn:
+            conn.execute(f'UPDATE jobs SET status = ?{columns} WHERE id = ?', (status, *fields.values(), job_id))
+
+    def _progress(self, job_id, stem, status, timings=None):
+        with self.transaction() as conn:
+            conn.execute('INSERT OR REPLACE INTO job_sections (job_id, section, status, timings, updated) VALUES (?, ?, ?, ?, ?)',
+                         (job_id, stem, status, json.dumps(timings) if timings else None, time.time()))
+
+    def _message(self, job_id, level, message):
+        with self.transaction() as conn:
+            conn.execute('INSERT INTO job_messages (job_id, created, level, message) VALUES (?, ?, ?, ?)',
+                         (job_id, time.time(), level, message))
+
+    def _run(self, job_id, config, options, uploads=None):
+        if self.cancel_requested(job_id):
+            self._set_status(job_id, 'cancelled', finished=time.time())
+            return
+        self._set_status(job_id, 'running', started=time.time())
+        try:
+            with capture_reports(lambda level, message: self._message(job_id, level, message)), use_uploads(uploads):
+                excel_folder = config.get('output', {}).get('excel_folder', 'output')
+                os.makedirs(excel_folder, exist_ok=True)
+                results = run_batch(
+                    config,
+                    workers=options['workers'],
+                    export=options['export'],
+                    run_llm=options['run_llm'],
+                    incremental=options['incremental'],
+                    progress=lambda stem, status, timings=None: self._progress(job_id, stem, status, timings),
+                    cancelled=lambda: self.cancel_requested(job_id),
+                )
+        except Exception as e:
+            # The capture is already reset here, so record the error directly.
+            print(f"Job {job_id} failed: {e}")
+            self._message(job_id, 'error', f"Job {job_id} failed: {e}")
+            with self.transaction() as conn:
+                conn.execute("UPDATE job_sections SET status = 'failed', updated = ? WHERE job_id = ? AND status IN ('pending', 'running')",
+                             (time.time(), job_id))
+            self._set_status(job_id, 'failed', error=str(e), finished=time.time())
+            return
+        status = 'cancelled' if any(timings['status'] == 'cancelled' for timings in results) else 'done'
+        self._set_status(job_id, status, finished=time.time())
+
+    def job(self, job_id):
+        with self.transaction() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['config'] = json.loads(job['config'])
+        job['options'] = json.loads(job['options'])
+        return job
+
+    def latest(self):
+        with self.transaction() as conn:
+            row = conn.execute('SELECT id FROM jobs ORDER BY created DESC LIMIT 1').fetchone()
+        return self.job(row['id']) if row else None
+
+    def sections(self, job_id):
+        with self.transaction() as conn:
+            rows = conn.execute('SELECT section, status, timings FROM job_sections WHERE job_id = ? ORDER BY section',
+                                (job_id,)).fetchall()
+        return [{'section': row['section'], 'status': row['status'], **json.loads(row['timings'] or '{}')} for row in rows]
+
+    def messages(self, job_id, limit=50):
+        with self.transaction() as conn:
+            rows = conn.execute('SELECT level, message FROM job_messages WHERE job_id = ? ORDER BY created DESC LIMIT ?',
+                                (job_id, limit)).fetchall()
+        return [(row['level'], row['message']) for row in reversed(rows)]
+
+    def progress(self, job_id):
+        # (finished sections, known sections); sections appear once planned.
+        sections = self.sections(job_id)
+        return sum(section['status'] in FINISHED for section in sections), len(sections)
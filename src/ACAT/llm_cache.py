@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.llm_cache.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed);
+"""
+
+
+def normalize(payload):
+    # Whitespace and indentation differences in prompts should not defeat the cache.
+    if isinstance(payload, str):
+        return re.sub(r'\s+', ' ', payload).strip()
+    if isinstance(payload, dict):
+        return {key: normalize(value) for key, value in sorted(payload.items())}
+    if isinstance(payload, (list, tuple)):
+        return [normalize(item) for item in payload]
+    return payload
+
+
+class LLMCache:
+    # On-disk response cache keyed on model, temperature and a hash of the
+    # normalized messages or task descriptions. Entries older than ttl_seconds
+    # are treated as misses; beyond max_entries the least recently used go first.
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, ttl_seconds=None, max_entries=10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        with self.transaction() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model, temperature, payload):
+        material = json.dumps({'model': model, 'temperature': temperature, 'payload': normalize(payload)},
+                              sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, model, temperature, payload):
+        key = self.make_key(model, temperature, payload)
+        now = time.time()
+        with self.transaction() as conn:
+            row = conn.execute('SELECT response, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        return row[0]
+
+    def put(self, model, temperature, payload, response):
+        key = self.make_key(model, temperature, payload)
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses (key, model, response, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, model, response, now, now),
+            )
+            if self.ttl_seconds is not None:
+                conn.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl_seconds,))
+            if self.max_entries:
+                conn.execute(
+                    'DELETE FROM responses WHERE key NOT IN '
+                    '(SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)',
+                    (self.max_entries,),
+                )
+
+    def get_json(self, model, temperature, payload):
+        response = self.get(model, temperature, payload)
+        return json.loads(response) if response is not None else None
+
+    def put_json(self, model, temperature, payload, value):
+        self.put(model, temperature, payload, json.dumps(value, default=str))
+
+    def stats(self):
+        with self.transaction() as conn:
+            entries = conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+    def clear(self):
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM responses')
+
+
+def cache_from_config(config):
+    cache_config = config.get('llm', {}).get('cache', {})
+    if not cache_config.get('enabled', True):
+        return None
+    return LLMCache(
+        db_path=cache_config.get('path', os.environ.get('ACAT_LLM_CACHE', DEFAULT_CACHE_PATH)),
+        ttl_seconds=cache_config.get('ttl_seconds'),
+        max_entries=cache_config.get('max_entries', 10000),
+    )
@@ -0,0 +1,317 @@
+import email.utils
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import httpx
+from llm_telemetry import count_retry
+
+# Imports only llm_telemetry; globals.py and the UI package import it by bare
+# name too (see src/acat_path.py), so there is one client and breaker.
+#
+# Every OpenAI-compatible client in the project shares one pooled HTTP client
+# whose transport applies per-call timeouts, jittered exponential backoff on
+# 429/5xx and a circuit breaker. The SDKs' own retries are turned off so a
+# request is never retried twice over.
+
+DEFAULT_SETTINGS = {
+    'timeout': 60.0,
+    'connect_timeout': 10.0,
+    'max_retries': 4,
+    'backoff_base': 0.5,
+    'backoff_max': 20.0,
+    'max_connections': 32,
+    'max_keepalive_connections': 16,
+    'failure_threshold': 5,
+    'reset_timeout': 30.0,
+    'hedge_after': None,
+}
+
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpen(httpx.TransportError):
+    # A TransportError, so the OpenAI SDK surfaces it as a connection error.
+    pass
+
+
+class CircuitBreaker:
+    # closed -> open after failure_threshold consecutive failures; open calls
+    # fail immediately until reset_timeout has passed, then one trial call is
+    # let through (half-open) and its outcome closes or re-opens the circuit.
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self._trial):
+                raise CircuitOpen(f"LLM circuit open after {self.failures} consecutive failures; retrying in "
+                                  f"{max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0):.0f}s")
+            if state == 'half-open':
+                self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def backoff_delay(attempt, base, cap, retry_after=None):
+    # "Full jitter": a uniform draw below the exponential ceiling, so clients
+    # that failed together do not retry together. A server-supplied
+    # Retry-After wins when it is longer.
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(retry_after)
+            if parsed is not None:
+                delay = max(delay, parsed.timestamp() - time.time())
+    return min(delay, cap)
+
+
+class _RetryPolicy:
+    def __init__(self, settings, breaker):
+        self.settings = settings
+        self.breaker = breaker
+
+    def attempts(self):
+        return range(self.settings['max_retries'] + 1)
+
+    def delay(self, attempt, response=None):
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        return backoff_delay(attempt, self.settings['backoff_base'], self.settings['backoff_max'], retry_after)
+
+    def is_last(self, attempt):
+        return attempt >= self.settings['max_retries']
+
+    def record(self, response):
+        if response.status_code in RETRY_STATUS:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+
+class ResilientTransport(httpx.BaseTransport):
+    def __init__(self, transport, policy):
+        self.transport = transport
+        self.policy = policy
+
+    def handle_request(self, request):
+        # The breaker sees one outcome per logical request, after its retries,
+        # so a single struggling call cannot trip the circuit for everyone.
+        self.policy.breaker.before_call()
+        try:
+            for attempt in self.policy.attempts():
+                try:
+                    response = self.transport.handle_request(request)
+                except httpx.TransportError:
+                    if self.policy.is_last(attempt):
+                        raise
+                    count_retry()
+                    time.sleep(self.policy.delay(attempt))
+                    continue
+                if response.status_code not in RETRY_STATUS or self.policy.is_last(attempt):
+                    break
+                response.read()
+                response.close()
+                count_retry()
+                time.sleep(self.policy.delay(attempt, response))
+        except Exception:
+            self.policy.breaker.record_failure()
+            raise
+        self.policy.record(response)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncResilientTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport, policy):
+        self.transport = transport
+        self.policy = policy
+
+    async def handle_async_request(self, request):
+        import asyncio
+        self.policy.breaker.before_call()
+        try:
+            for attempt in self.policy.attempts():
+                try:
+                    response = await self.transport.handle_async_request(request)
+                except httpx.TransportError:
+                    if self.policy.is_last(attempt):
+                        raise
+                    count_retry()
+                    await asyncio.sleep(self.policy.delay(attempt))
+                    continue
+                if response.status_code not in RETRY_STATUS or self.policy.is_last(attempt):
+                    break
+                await response.aread()
+                await response.aclose()
+                count_retry()
+                await asyncio.sleep(self.policy.delay(attempt, response))
+        except Exception:
+            self.policy.breaker.record_failure()
+            raise
+        self.policy.record(response)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_settings = dict(DEFAULT_SETTINGS)
+_breaker = CircuitBreaker(_settings['failure_threshold'], _settings['reset_timeout'])
+_clients = {}
+_lock = threading.Lock()
+_hedge_pool = None
+
+
+def configure(**settings):
+    # Call before the first client is built (e.g. from the "llm.client" config
+    # section); clients that already exist keep their pool.
+    global _breaker
+    unknown = set(settings) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown LLM client settings: {', '.join(sorted(unknown))}")
+    settings = {key: value for key, value in settings.items() if value is not None}
+    with _lock:
+        if all(_settings[key] == value for key, value in settings.items()):
+            # Unchanged: keep the pool and the breaker's failure history.
+            return dict(_settings)
+        _settings.update(settings)
+        _breaker = CircuitBreaker(_settings['failure_threshold'], _settings['reset_timeout'])
+        _clients.clear()
+    return dict(_settings)
+
+
+def configure_from_config(config):
+    return configure(**config.get('llm', {}).get('client', {}))
+
+
+def get_breaker():
+    return _breaker
+
+
+def timeout():
+    return httpx.Timeout(_settings['timeout'], connect=_settings['connect_timeout'])
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=_settings['max_connections'],
+        max_keepalive_connections=_settings['max_keepalive_connections'],
+    )
+
+
+def http_client():
+    with _lock:
+        if 'sync' not in _clients:
+            policy = _RetryPolicy(_settings, _breaker)
+            _clients['sync'] = httpx.Client(
+                transport=ResilientTransport(httpx.HTTPTransport(limits=_limits()), policy),
+                timeout=timeout(),
+            )
+        return _clients['sync']
+
+
+def async_http_client():
+    with _lock:
+        if 'async' not in _clients:
+            policy = _RetryPolicy(_settings, _breaker)
+            _clients['async'] = httpx.AsyncClient(
+                transport=AsyncResilientTransport(httpx.AsyncHTTPTransport(limits=_limits()), policy),
+                timeout=timeout(),
+            )
+        return _clients['async']
+
+
+def openai_client(api_key=None, base_url=None):
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client(), timeout=timeout(), max_retries=0)
+
+
+def chat_model(model_name, temperature=0.0, max_tokens=None, **kwargs):
+    # LangChain ChatOpenAI on the shared pool; extra kwargs (callbacks, ...)
+    # are passed through.
+    import langchain_openai as lang_oai
+    return lang_oai.ChatOpenAI(
+        model_name=model_name,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        http_client=http_client(),
+        http_async_client=async_http_client(),
+        request_timeout=timeout(),
+        max_retries=0,
+        **kwargs,
+    )
+
+
+def crew_llm(model_name, temperature=0.0, max_tokens=None, **kwargs):
+    # crewai LLM (litellm) whose requests go out through openai_client(), so
+    # agents get the pool's timeouts, backoff and circuit breaker. litellm's
+    # own retries are off, as the SDKs' are.
+    from crewai import LLM
+    return LLM(
+        model=model_name,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        timeout=_settings['timeout'],
+        num_retries=0,
+        client=openai_client(),
+        **kwargs,
+    )
+
+
+def hedged(call, hedge_after=None):
+    # Tail-latency guard for interactive calls: if the first attempt has not
+    # answered within hedge_after seconds, a second identical request is sent
+    # and whichever finishes first wins. Costs up to one extra request, so it
+    # is off unless hedge_after is set.
+    global _hedge_pool
+    hedge_after = hedge_after if hedge_after is not None else _settings['hedge_after']
+    if not hedge_after:
+        return call()
+    with _lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm-hedge')
+    futures = [_hedge_pool.submit(call)]
+    done, _ = wait(futures, timeout=hedge_after)
+    if not done:
+        futures.append(_hedge_pool.submit(call))
+    error = None
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+    raise error
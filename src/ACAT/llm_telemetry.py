@@ -0,0 +1,214 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Standard library only: globals.py and the Helpers package import it by bare
+# name too (see src/acat_path.py), so configure() reaches their callbacks, and
+# llm_client imports it to report retries.
+
+# USD per token (input, output).
+PRICES = {
+    'gpt-4o': (2.5 / 1e6, 10.0 / 1e6),
+    'gpt-4o-mini': (0.15 / 1e6, 0.6 / 1e6),
+    'gpt-4.1': (2.0 / 1e6, 8.0 / 1e6),
+    'gpt-4.1-mini': (0.4 / 1e6, 1.6 / 1e6),
+}
+
+_context = contextvars.ContextVar('llm_telemetry_context', default={})
+# The record of the call in flight, so llm_client's transport can credit its
+# retries to it (see count_retry).
+_call = contextvars.ContextVar('llm_telemetry_call', default=None)
+_retry_lock = threading.Lock()
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+def price_for(model):
+    model = (model or '').split('/')[-1]
+    # Dated snapshots such as gpt-4o-2024-08-06 share their family's price.
+    for name in sorted(PRICES, key=len, reverse=True):
+        if model.startswith(name):
+            return PRICES[name]
+    return 0.0, 0.0
+
+
+def cost_for(model, prompt_tokens, completion_tokens):
+    input_price, output_price = price_for(model)
+    return prompt_tokens * input_price + completion_tokens * output_price
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class Telemetry:
+    # Records every LLM call (tokens, latency, retries, cost) with the stage,
+    # course and student it belongs to, appends it to a JSONL metrics file, and
+    # raises BudgetExceeded once an optional spend or token ceiling is reached.
+
+    def __init__(self, metrics_file=None, max_cost_usd=None, max_tokens=None):
+        self.metrics_file = metrics_file
+        self.max_cost_usd = max_cost_usd
+        self.max_tokens = max_tokens
+        self.records = []
+        self.total_cost = 0.0
+        self.total_tokens = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def context(self, **labels):
+        token = _context.set({**_context.get(), **labels})
+        try:
+            yield
+        finally:
+            _context.reset(token)
+
+    def check_budget(self):
+        if self.max_cost_usd is not None and self.total_cost >= self.max_cost_usd:
+            raise BudgetExceeded(f"LLM spend ceiling of ${self.max_cost_usd:.2f} reached (${self.total_cost:.4f} spent)")
+        if self.max_tokens is not None and self.total_tokens >= self.max_tokens:
+            raise BudgetExceeded(f"LLM token ceiling of {self.max_tokens} reached ({self.total_tokens} used)")
+
+    @contextmanager
+    def track(self, stage, model, **labels):
+        # The caller fills in prompt_tokens/completion_tokens on the yielded
+        # record; retries are counted by the transport, latency and errors here.
+        self.check_budget()
+        record = {'stage': stage, 'model': model, **_context.get(), **labels,
+                  'prompt_tokens': 0, 'completion_tokens': 0, 'retries': 0}
+        token = _call.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record['latency'] = time.perf_counter() - start
+            _call.reset(token)
+            self.record(record)
+
+    def record(self, record):
+        record.setdefault('timestamp', time.time())
+        record['cost_usd'] = cost_for(record.get('model'), record.get('prompt_tokens', 0), record.get('completion_tokens', 0))
+        with self._lock:
+            self.records.append(record)
+            self.total_cost += record['cost_usd']
+            self.total_tokens += record.get('prompt_tokens', 0) + record.get('completion_tokens', 0)
+            if self.metrics_file:
+                directory = os.path.dirname(self.metrics_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.metrics_file, 'a') as file:
+                    file.write(json.dumps(record, default=str) + '\n')
+
+    def summary(self, by='stage'):
+        groups = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            groups.setdefault(record.get(by), []).append(record)
+        summary = {}
+        for key, group in groups.items():
+            latencies = [record['latency'] for record in group]
+            summary[key] = {
+                'calls': len(group),
+                'errors': sum(1 for record in group if 'error' in record),
+                'retries': sum(record.get('retries', 0) for record in group),
+                'prompt_tokens': sum(record['prompt_tokens'] for record in group),
+                'completion_tokens': sum(record['completion_tokens'] for record in group),
+                'cost_usd': sum(record['cost_usd'] for record in group),
+                'latency_p50': percentile(latencies, 0.50),
+                'latency_p95': percentile(latencies, 0.95),
+                'latency_p99': percentile(latencies, 0.99),
+            }
+        return summary
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry():
+    return _telemetry
+
+
+def configure(metrics_file=None, max_cost_usd=None, max_tokens=None):
+    global _telemetry
+    _telemetry = Telemetry(metrics_file, max_cost_usd, max_tokens)
+    return _telemetry
+
+
+def count_retry():
+    # Called by llm_client's transport for every retried attempt.
+    record = _call.get()
+    if record is not None:
+        with _retry_lock:
+            record['retries'] = record.get('retries', 0) + 1
+
+
+def telemetry_from_config(config):
+    settings = config.get('llm', {}).get('telemetry', {})
+    return configure(
+        metrics_file=settings.get('metrics_file', 'llm_metrics.jsonl'),
+        max_cost_usd=settings.get('max_cost_usd'),
+        max_tokens=settings.get('max_tokens'),
+    )
+
+
+def langchain_callback(telemetry=None, stage='agent'):
+    # Attach to a LangChain chat model (callbacks=[...]) so every call the
+    # agents make is recorded, not just whole crews.
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TelemetryCallbackHandler(BaseCallbackHandler):
+        # LangChain swallows exceptions from handlers unless raise_error is
+        # set, and BudgetExceeded must stop the call.
+        raise_error = True
+
+        def __init__(self):
+            self.started = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(run_id)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(run_id)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            usage = (response.llm_output or {}).get('token_usage', {})
+            self._finish(run_id, model=(response.llm_output or {}).get('model_name'),
+                         prompt_tokens=usage.get('prompt_tokens', 0),
+                         completion_tokens=usage.get('completion_tokens', 0))
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id, model=None, prompt_tokens=0, completion_tokens=0,
+                         error=f"{type(error).__name__}: {error}")
+
+        def _start(self, run_id):
+            (telemetry or get_telemetry()).check_budget()
+            record = {'stage': stage, **_context.get(), 'retries': 0}
+            self.started[run_id] = (time.perf_counter(), record, _call.set(record))
+
+        def _finish(self, run_id, **fields):
+            start, record, token = self.started.pop(run_id, (time.perf_counter(), {'stage': stage, 'retries': 0}, None))
+            if token is not None:
+                try:
+                    _call.reset(token)
+                except ValueError:
+                    # Ended in another context (async runs); nothing to undo here.
+                    pass
+            record.update(fields, latency=time.perf_counter() - start)
+            (telemetry or get_telemetry()).record(record)
+
+    return TelemetryCallbackHandler()
@@ -0,0 +1,223 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from token_estimate import estimate_tokens
+
+# Deterministic OpenAI-compatible stand-in for offline runs and benchmarks.
+# Serves /v1/chat/completions (plain and streamed) and /v1/models. The answer,
+# its latency and whether it fails are all derived from the request body and
+# how many times that body has been seen, so a run is reproducible regardless
+# of how concurrent requests interleave, and a retried request can succeed.
+#
+#   python mock_llm_server.py --port 8765 --latency-ms 300 --error-rate 0.05
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=mock python batch.py --llm
+
+FILLER = ("the student shows consistent attainment across outcomes with room to improve "
+          "in applied problem solving and written communication").split()
+TABLE_ROW = re.compile(r'^([^|\n]+)\|', re.MULTILINE)
+
+
+def message_text(messages):
+    parts = []
+    for message in messages:
+        content = message.get('content') or ''
+        if isinstance(content, list):
+            content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+        parts.append(content)
+    return '\n'.join(parts)
+
+
+def mock_answer(prompt, digest, completion_tokens):
+    words = [f"Mock assessment {digest[:8]}:"]
+    words += [FILLER[i % len(FILLER)] for i in range(max(completion_tokens - 4, 0))]
+    text = ' '.join(words)
+    if '"assessments"' in prompt:
+        # Batched prompts ask for one JSON entry per "SIS User ID|..." table row.
+        students = [sid.strip() for sid in TABLE_ROW.findall(prompt) if sid.strip() != 'SIS User ID']
+        students = list(dict.fromkeys(students))
+        text = json.dumps({'assessments': [{'student': sid, 'assessment': text} for sid in students]})
+    return text
+
+
+class MockLLMServer:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.2, jitter=0.05, completion_tokens=120,
+                 error_rate=0.0, error_status=429, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.requests = []
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock-llm', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = []
+
+    def stats(self):
+        with self._lock:
+            requests = list(self.requests)
+        ok = [request for request in requests if request['status'] == 200]
+        return {
+            'requests': len(requests),
+            'errors': len(requests) - len(ok),
+            'prompt_tokens': sum(request['prompt_tokens'] for request in ok),
+            'completion_tokens': sum(request['completion_tokens'] for request in ok),
+        }
+
+    def plan(self, body):
+        # Returns (digest, delay, status) for one request.
+        digest = hashlib.sha256(json.dumps(body.get('messages', []), sort_keys=True).encode('utf-8')).hexdigest()
+        with self._lock:
+            attempt = self._seen.get(digest, 0)
+            self._seen[digest] = attempt + 1
+        rng = random.Random(f"{self.seed}:{digest}:{attempt}")
+        delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        status = self.error_status if rng.random() < self.error_rate else 200
+        return digest, delay, status
+
+    def log(self, **request):
+        with self._lock:
+            self.requests.append(request)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, payload, headers=()):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip('/') in ('/v1/models', '/models'):
+                    self.send_json(200, {'object': 'list', 'data': [{'id': 'mock', 'object': 'model', 'owned_by': 'mock'}]})
+                else:
+                    self.send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+
+            def do_POST(self):
+                if self.path.rstrip('/') not in ('/v1/chat/completions', '/chat/completions'):
+                    self.send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                prompt = message_text(body.get('messages', []))
+                digest, delay, status = server.plan(body)
+                time.sleep(delay)
+                prompt_tokens = estimate_tokens(prompt)
+                completion_tokens = min(server.completion_tokens, body.get('max_tokens') or server.completion_tokens)
+                server.log(status=status, latency=delay, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+                if status != 200:
+                    self.send_json(status, {'error': {'message': 'Injected mock failure', 'type': 'mock_error', 'code': status}},
+                                   headers=[('Retry-After', '0')])
+                    return
+                content = mock_answer(prompt, digest, completion_tokens)
+                usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                         'total_tokens': prompt_tokens + completion_tokens}
+                completion_id = f"chatcmpl-{digest[:24]}"
+                model = body.get('model', 'mock')
+                if body.get('stream'):
+                    self.stream(completion_id, model, content, usage, body.get('stream_options') or {})
+                    return
+                self.send_json(200, {
+                    'id': completion_id,
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': usage,
+                })
+
+            def stream(self, completion_id, model, content, usage, stream_options):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                def chunk(delta, finish_reason=None, **extra):
+                    payload = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                               'model': model, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}], **extra}
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+
+                chunk({'role': 'assistant', 'content': ''})
+                for piece in re.findall(r'\S+\s*', content):
+                    chunk({'content': piece})
+                chunk({}, 'stop')
+                if stream_options.get('include_usage'):
+                    payload = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                               'model': model, 'choices': [], 'usage': usage}
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a deterministic OpenAI-compatible mock LLM server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=200, help="Mean response latency")
+    parser.add_argument('--jitter-ms', type=float, default=50, help="Uniform +/- latency jitter")
+    parser.add_argument('--completion-tokens', type=int, default=120, help="Tokens in every answer")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=429, help="HTTP status of injected failures")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency_ms / 1000, args.jitter_ms / 1000, args.completion_tokens,
+                           args.error_rate, args.error_status, args.seed)
+    print(f"Mock LLM server listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Served: {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
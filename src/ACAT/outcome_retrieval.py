@@ -0,0 +1,131 @@
+import math
+import re
+from collections import Counter
+
+# Answers the data part of cohort questions locally ("which students are below
+# 3 on COMP-301 CO2?") so the chat only sends the matching rows to the model
+# instead of every student's outcomes. Course and outcome codes, student ids
+# and comparisons are parsed from the question; when no outcome code is given,
+# a BM25 index over the outcome descriptions picks the relevant outcomes.
+# Outcome codes are positional per course (CO1/O1 = first outcome), matching
+# the legend of prompt_encoding.encode_courses.
+
+STOPWORDS = set("""
+a an and are as at be by can do does for from has have how i in is it its me of on or show
+student students that the their them they this to was were what which who whose with
+""".split())
+
+COMPARISONS = [
+    (r'(?:<=|at most|no more than)', '<='),
+    (r'(?:>=|at least|no less than)', '>='),
+    (r'(?:<|below|under|less than|lower than|fewer than)', '<'),
+    (r'(?:>|above|over|greater than|more than|higher than)', '>'),
+    (r'(?:=|equal to|equals|exactly)', '='),
+]
+COURSE = re.compile(r'\b([A-Za-z]{2,5})[- ]?(\d{3})\b')
+OUTCOME = re.compile(r'\bC?O(\d{1,2})\b', re.IGNORECASE)
+STUDENTS = re.compile(r'\bstudents?\s+(?:ids?\s+)?#?(\d+(?:\s*(?:,|and)\s*#?\d+)*)', re.IGNORECASE)
+COHORT = re.compile(r'\b(students|who|which|how many|average|mean|cohort|class|lowest|highest|struggl\w*)\b', re.IGNORECASE)
+
+DEFAULT_ROW_LIMIT = 40
+BM25_OUTCOMES = 3
+
+
+def tokenize(text):
+    return [word for word in re.findall(r'[a-z0-9]+', text.lower()) if word not in STOPWORDS]
+
+
+class BM25:
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(document.values()) for document in self.documents]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        frequencies = Counter(term for document in self.documents for term in document)
+        total = len(self.documents)
+        self.idf = {term: math.log(1 + (total - count + 0.5) / (count + 0.5)) for term, count in frequencies.items()}
+
+    def scores(self, query):
+        terms = tokenize(query)
+        results = []
+        for document, length in zip(self.documents, self.lengths):
+            score = 0.0
+            for term in terms:
+                if term in document:
+                    frequency = document[term]
+                    norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+                    score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            results.append(score)
+        return results
+
+
+def parse_question(question, courses=None):
+    # courses: known course codes. COURSE also matches phrases such as "more
+    # than 100" (THAN-100), so when given only known codes are kept.
+    parsed = {'courses': [], 'positions': [], 'students': [], 'op': None, 'value': None}
+    found = dict.fromkeys(f"{prefix.upper()}-{number}" for prefix, number in COURSE.findall(question))
+    parsed['courses'] = [course for course in found if courses is None or course in courses]
+    parsed['positions'] = [int(number) - 1 for number in OUTCOME.findall(question)]
+    for group in STUDENTS.findall(question):
+        parsed['students'] += re.findall(r'\d+', group)
+    for pattern, op in COMPARISONS:
+        match = re.search(r'(?<![a-z])' + pattern + r'\s*(\d+(?:\.\d+)?)', question, re.IGNORECASE)
+        if match:
+            parsed['op'], parsed['value'] = op, float(match.group(1))
+            break
+    return parsed
+
+
+class OutcomeRetriever:
+    def __init__(self, index, row_limit=DEFAULT_ROW_LIMIT):
+        self.index = index
+        self.row_limit = row_limit
+        self.catalog = index.catalog()
+        self.courses = {course for course, _, _ in self.catalog}
+        self.bm25 = BM25([outcome for _, _, outcome in self.catalog])
+
+    def select_outcomes(self, question, parsed):
+        courses = [course for course in parsed['courses'] if course in self.courses]
+        if courses and parsed['positions']:
+            return [(course, position) for course in courses for position in parsed['positions']]
+        candidates = [i for i, (course, _, _) in enumerate(self.catalog) if not courses or course in courses]
+        scores = self.bm25.scores(question)
+        ranked = sorted((i for i in candidates if scores[i] > 0), key=lambda i: scores[i], reverse=True)
+        if ranked:
+            return [self.catalog[i][:2] for i in ranked[:BM25_OUTCOMES]]
+        # A course without a matching description: all of its outcomes.
+        return [self.catalog[i][:2] for i in candidates] if courses else []
+
+    def retrieve(self, question):
+        # Returns the prompt context for the question, or '' when it does not
+        # look like a question about the stored outcomes.
+        parsed = parse_question(question, self.courses)
+        if not (parsed['courses'] or parsed['students'] or parsed['op'] or COHORT.search(question)):
+            return ''
+        outcomes = self.select_outcomes(question, parsed)
+        if not outcomes and not parsed['students']:
+            return ''
+        rows = self.index.scores(outcomes, parsed['students'], parsed['op'], parsed['value'])
+        overall = self.index.scores(outcomes, parsed['students']) if parsed['op'] else rows
+        return self.format(outcomes, parsed, rows, overall)
+
+    def format(self, outcomes, parsed, rows, overall):
+        lines = ["Data retrieved locally from the assessment results (Likert 1-5; O<n> is the n-th outcome of a course):"]
+        for (course, position), group in overall.groupby(['course', 'position'], sort=False):
+            scores = group['score'].dropna()
+            lines.append(
+                f"{course} O{position + 1} {group['outcome'].iloc[0].rstrip('.')}: {len(scores)} students, "
+                f"mean {scores.mean():.2f}, min {scores.min():g}, max {scores.max():g}"
+            )
+        if parsed['op']:
+            lines.append(f"Rows (student, outcome) with score {parsed['op']} {parsed['value']:g}: {len(rows)}")
+        if rows.empty:
+            lines.append("No matching rows.")
+            return '\n'.join(lines)
+        lines.append("student|course|outcome|score")
+        for row in rows.head(self.row_limit).itertuples(index=False):
+            lines.append(f"{row.student}|{row.course}|O{row.position + 1}|{row.score:g}")
+        if len(rows) > self.row_limit:
+            lines.append(f"... {len(rows) - self.row_limit} more rows not shown")
+        return '\n'.join(lines)
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+from warehouse import student_key
+
+INDEX_FILE = '.outcomes_index.db'
+RESULTS_SUFFIX = '_outcomes.xlsx'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    course TEXT NOT NULL,
+    semester TEXT,
+    section TEXT,
+    level TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scores (
+    student TEXT NOT NULL,
+    path TEXT NOT NULL REFERENCES files (path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    score REAL,
+    PRIMARY KEY (student, path, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_scores_path ON scores (path);
+"""
+
+
+def parse_results_name(file_name):
+    # COMP-101_FA24_01_outcomes.xlsx (CO) or COMP-101_FA24_01_po_outcomes.xlsx
+    parts = file_name[:-len(RESULTS_SUFFIX)].split('_')
+    parts += [None] * (3 - len(parts))
+    level = parts[3] if len(parts) > 3 else 'co'
+    return {'course': parts[0], 'semester': parts[1], 'section': parts[2], 'level': level}
+
+
+def as_number(score):
+    if score is None:
+        return None
+    return int(score) if float(score).is_integer() else score
+
+
+class OutcomesIndex:
+    # student -> (course, outcome, score) over every *_outcomes.xlsx in a
+    # results folder, kept in SQLite next to the files. refresh() re-parses only
+    # workbooks whose mtime or size changed, so repeated lookups cost one stat
+    # per file and an indexed query instead of an Excel parse per file.
+
+    def __init__(self, results_dir, db_path=None):
+        self.results_dir = results_dir
+        self.db_path = db_path or os.path.join(results_dir, INDEX_FILE)
+        with self.transaction() as conn:
+            conn.executescript(SCHEMA)
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def refresh(self):
+        current = {}
+        for file_name in sorted(os.listdir(self.results_dir)):
+            if file_name.endswith(RESULTS_SUFFIX) and not file_name.startswith('~$'):
+                stat = os.stat(os.path.join(self.results_dir, file_name))
+                current[file_name] = (stat.st_mtime_ns, stat.st_size)
+        changed = 0
+        with self.transaction() as conn:
+            indexed = {path: (mtime_ns, size) for path, mtime_ns, size in conn.execute('SELECT path, mtime_ns, size FROM files')}
+            for path in set(indexed) - set(current):
+                conn.execute('DELETE FROM files WHERE path = ?', (path,))
+            for path, signature in current.items():
+                if indexed.get(path) == signature:
+                    continue
+                conn.execute('DELETE FROM files WHERE path = ?', (path,))
+                self._index_file(conn, path, signature)
+                changed += 1
+        return changed
+
+    def _index_file(self, conn, path, signature):
+        try:
+            df = pd.read_excel(os.path.join(self.results_dir, path))
+        except Exception as e:
+            print(f"Error processing file {os.path.join(self.results_dir, path)}: {e}")
+            return
+        conn.execute(
+            'INSERT INTO files (path, course, semester, section, level, mtime_ns, size) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (path, *parse_results_name(path).values(), *signature),
+        )
+        # First column holds the SIS User ID; PO/IO files also carry a Class Average row.
+        df = df[df.iloc[:, 0].notna() & (df.iloc[:, 0] != 'Class Average')]
+        rows = []
+        for position, outcome in enumerate(df.columns[1:]):
+            for student, score in zip(df.iloc[:, 0], df[outcome]):
+                rows.append((student_key(student), path, position, str(outcome), None if pd.isna(score) else float(score)))
+        conn.executemany('INSERT OR REPLACE INTO scores (student, path, position, outcome, score) VALUES (?, ?, ?, ?, ?)', rows)
+
+    def student(self, student_id, level='co'):
+        # {course: {outcome: score}}; with several sections of a course the
+        # last file in name order wins, as the per-file scan did.
+        with self.transaction() as conn:
+            rows = conn.execute(
+                'SELECT f.path, f.course, s.outcome, s.score FROM scores s JOIN files f ON f.path = s.path '
+                'WHERE s.student = ? AND f.level = ? ORDER BY f.path, s.position',
+                (student_key(student_id), level),
+            ).fetchall()
+        by_file = {}
+        for path, course, outcome, score in rows:
+            by_file.setdefault(path, (course, {}))[1][outcome] = as_number(score)
+        return {course: outcomes for course, outcomes in by_file.values()}
+
+    def transcripts(self, student_ids=None, level='co'):
+        # Every student x (course, outcome) score in one query: students as
+        # rows, a (course, outcome) column MultiIndex in file/column order.
+        sql = ('SELECT s.student, f.course, s.outcome, s.score FROM scores s JOIN files f ON f.path = s.path '
+               'WHERE f.level = ?')
+        params = [level]
+        if student_ids is not None:
+            keys = [student_key(sid) for sid in student_ids]
+            sql += f" AND s.student IN ({', '.join('?' * len(keys))})"
+            params += keys
+        with self.transaction() as conn:
+            long_scores = pd.read_sql_query(sql + ' ORDER BY f.path, s.position', conn, params=params)
+        columns = pd.MultiIndex.from_frame(long_scores[['course', 'outcome']].drop_duplicates())
+        matrix = long_scores.pivot_table(index='student', columns=['course', 'outcome'], values='score', aggfunc='last', dropna=False)
+        matrix = matrix.reindex(columns=columns)
+        matrix.index.name = 'SIS User ID'
+        return matrix
+
+    def catalog(self, level='co'):
+        # (course, position, outcome) for every indexed outcome, in file order.
+        with self.transaction() as conn:
+            return conn.execute(
+                'SELECT DISTINCT f.course, s.position, s.outcome FROM scores s JOIN files f ON f.path = s.path '
+                'WHERE f.level = ? ORDER BY f.course, s.position',
+                (level,),
+            ).fetchall()
+
+    def scores(self, outcomes=None, students=None, op=None, value=None, level='co'):
+        # Long rows (student, course, position, outcome, score) filtered in SQL:
+        # outcomes is a list of (course, position) pairs, op one of < <= > >= =.
+        sql = ('SELECT s.student, f.course, s.position, s.outcome, s.score FROM scores s '
+               'JOIN files f ON f.path = s.path WHERE f.level = ?')
+        params = [level]
+        if outcomes:
+            sql += f" AND ({' OR '.join('(f.course = ? AND s.position = ?)' for _ in outcomes)})"
+            params += [item for pair in outcomes for item in pair]
+        if students:
+            sql += f" AND s.student IN ({', '.join('?' * len(students))})"
+            params += [student_key(sid) for sid in students]
+        if op is not None:
+            if op not in ('<', '<=', '>', '>=', '='):
+                raise ValueError(f"Unsupported comparison: {op}")
+            sql += f" AND s.score {op} ?"
+            params.append(value)
+        with self.transaction() as conn:
+            return pd.read_sql_query(sql + ' ORDER BY f.course, s.position, s.score, s.student', conn, params=params)
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import pickle
+import stat
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parse_cache')
+
+
+class ParseCache:
+    # Two-level cache for parsed workbooks: an in-memory LRU in front of pickled
+    # frames on disk. Entries are keyed on the file's absolute path plus its
+    # mtime and size, so a workbook is parsed by openpyxl again only once it changes.
+    # Loading a pickle runs code, so the disk level is used only while the
+    # cache directory belongs to the current user and nobody else can write to it.
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=64, max_disk_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_ok = None
+
+    @staticmethod
+    def fingerprint(filepath):
+        stat = os.stat(filepath)
+        return os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size
+
+    def _private_dir(self):
+        # Created with mode 0o700; an existing directory that is shared or
+        # owned by someone else disables the disk level for this process.
+        if self._disk_ok is None:
+            try:
+                os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+                info = os.stat(self.cache_dir)
+                owned = not hasattr(os, 'getuid') or info.st_uid == os.getuid()
+                shared = info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+                self._disk_ok = owned and not shared
+                if not self._disk_ok:
+                    print(f"Warning: parse cache directory {self.cache_dir} is not private to this user; "
+                          f"caching parsed workbooks in memory only")
+            except OSError as e:
+                print(f"Warning: could not create parse cache directory {self.cache_dir}: {e}")
+                self._disk_ok = False
+        return self._disk_ok
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def read_excel(self, filepath, **kwargs):
+        key = self.fingerprint(filepath) + (tuple(sorted(kwargs.items())),)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key].copy()
+        df = self._load_from_disk(key)
+        if df is None:
+            self.misses += 1
+            df = pd.read_excel(filepath, **kwargs)
+            self._save_to_disk(key, df)
+        else:
+            self.hits += 1
+        with self._lock:
+            self._memory[key] = df
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        # Callers rename and filter columns in place, so never hand out the cached frame.
+        return df.copy()
+
+    def _load_from_disk(self, key):
+        if not self.cache_dir or not self._private_dir():
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as file:
+                df = pickle.load(file)
+            os.utime(path)
+            return df
+        except Exception:
+            # Truncated, corrupt or written by an incompatible pandas: a miss.
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _save_to_disk(self, key, df):
+        if not self.cache_dir or not self._private_dir():
+            return
+        path = self._disk_path(key)
+        try:
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as file:
+                pickle.dump(df, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+            self._evict()
+        except OSError as e:
+            print(f"Warning: could not write parse cache entry {path}: {e}")
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+parse_cache = ParseCache(cache_dir=os.environ.get('ACAT_PARSE_CACHE_DIR', DEFAULT_CACHE_DIR))
+
+
+def read_excel_cached(filepath, **kwargs):
+    return parse_cache.read_excel(filepath, **kwargs)
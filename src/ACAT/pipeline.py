@@ -0,0 +1,151 @@
+import os
+import numpy as np
+import pandas as pd
+from acat import ACAT
+from propagation import PropagationEngine
+from readers import safe_read_excel
+from reporting import report
+from warehouse import Warehouse
+
+LEVELS = ('co', 'po', 'io')
+
+
+def load_mapping(mapping_file, key_column, prefix):
+    if not mapping_file:
+        report('error', f"Error: mapping file for '{key_column}' not specified in config")
+        return None
+    df = safe_read_excel(mapping_file)
+    if df is None:
+        return None
+    if key_column not in df.columns:
+        report('error', f"Error: '{key_column}' column missing in {mapping_file}")
+        return None
+    if not [col for col in df.columns if col.startswith(prefix)]:
+        report('error', f"Error: No {prefix} columns found in {mapping_file}")
+        return None
+    return df
+
+
+def load_mappings(config):
+    return PropagationEngine.from_config(config, load_mapping)
+
+
+def co_frame(student_outcomes):
+    df = pd.DataFrame.from_dict(student_outcomes, orient='index')
+    df.index.name = 'SIS User ID'
+    return df
+
+
+def run_section(course_name, semester, section, final_outcomes, student_data, engine):
+    # CO, PO and IO frames are handed from stage to stage in memory; nothing is
+    # written to disk here. Use export_section() as the final sink.
+    acat = ACAT(course_name, semester, section, final_outcomes, student_data)
+    co_df = co_frame(acat.compute_course_outcomes())
+    acat.summarize_course_outcomes(co_df.to_dict(orient='index'))
+    return rollup_section(co_df, course_name, engine)
+
+
+def rollup_section(co_df, course_name, engine):
+    frames = {level: None for level in LEVELS}
+    frames['co'] = co_df
+    frames.update(engine.run(co_df, course_name))
+    return frames
+
+
+def with_class_average(scores):
+    class_average = scores.mean().to_frame().T
+    class_average.index = ['Class Average']
+    output_df = pd.concat([scores, class_average])
+    output_df.index.name = 'SIS User ID'
+    return output_df.reset_index().round(2)
+
+
+def section_stem(course_name, semester, section):
+    return f"{course_name}_{semester}_{section}"
+
+
+def export_section(frames, course_name, semester, section, excel_folder=None, warehouse_file=None):
+    stem = section_stem(course_name, semester, section)
+    written = []
+    if excel_folder:
+        os.makedirs(excel_folder, exist_ok=True)
+        level_files = {
+            level: f"{stem}_outcomes.xlsx" if level == 'co' else f"{stem}_{level}_outcomes.xlsx"
+            for level in frames
+        }
+        for level, file_name in level_files.items():
+            if frames.get(level) is None:
+                continue
+            output_file = os.path.join(excel_folder, file_name)
+            try:
+                if level == 'co':
+                    frames[level].to_excel(output_file)
+                else:
+                    with_class_average(frames[level]).to_excel(output_file, index=False)
+                written.append(output_file)
+                report('success', f"Saved {level.upper()} outcomes to {output_file}")
+            except Exception as e:
+                report('error', f"Error saving {level.upper()} outcomes to {output_file}: {e}")
+    if warehouse_file:
+        Warehouse(warehouse_file).upsert_section(course_name, semester, section, frames)
+        written.append(warehouse_file)
+        report('success', f"Saved {stem} outcomes to warehouse {warehouse_file}")
+    return written
+
+
+COHORT_FILE = 'cohort_rollup.xlsx'
+DEFAULT_PROGRAM = 'Program'
+
+
+def cohort_configs(engine, course_semesters, program=DEFAULT_PROGRAM):
+    # program_config / institution_config for ACAT's cross-course rollups, read
+    # off the compiled mapping workbooks the per-section levels use: a PO pools
+    # every CO of every course that maps to it, an IO every PO that maps to it,
+    # each with its mapping weight.
+    program_outcomes = {}
+    for course, semester in course_semesters:
+        mapping = engine.mapping_for(0, course)
+        weights = mapping.weights.toarray()
+        for j, po in enumerate(mapping.targets):
+            sources = program_outcomes.setdefault(po, {})
+            for i in np.nonzero(weights[:, j])[0]:
+                sources[(course, semester, mapping.sources[i])] = float(weights[i, j])
+    institution_config = None
+    if len(engine.levels) > 1:
+        mapping = engine.mapping_for(1, None)
+        weights = mapping.weights.toarray()
+        institution_config = {
+            io: {(program, mapping.sources[i]): float(weights[i, j]) for i in np.nonzero(weights[:, j])[0]}
+            for j, io in enumerate(mapping.targets)
+        }
+    return {program: program_outcomes}, institution_config
+
+
+def rollup_cohort(engine, co_frames, program=DEFAULT_PROGRAM):
+    # co_frames: {(course, semester, section): CO frame} for every section of a
+    # run. Returns cohort-wide PO (and IO) averages over the pooled student scores.
+    if not engine.levels or not co_frames:
+        return {}
+    program_config, institution_config = cohort_configs(engine, sorted({key[:2] for key in co_frames}), program)
+    program_outcomes = ACAT.compute_program_outcomes(program_config, co_frames)
+    frames = {'po': pd.DataFrame(
+        [(program, po, score) for po, score in program_outcomes[program].items()],
+        columns=['Program', 'Program Outcome', 'Cohort Average'],
+    )}
+    if institution_config is not None:
+        institution_outcomes = ACAT.compute_institution_outcomes(institution_config, program_outcomes)
+        frames['io'] = pd.DataFrame(list(institution_outcomes.items()), columns=['Institution Outcome', 'Cohort Average'])
+    return frames
+
+
+def export_cohort(frames, excel_folder):
+    os.makedirs(excel_folder, exist_ok=True)
+    output_file = os.path.join(excel_folder, COHORT_FILE)
+    try:
+        with pd.ExcelWriter(output_file) as writer:
+            for level, frame in frames.items():
+                frame.round(2).to_excel(writer, sheet_name=level.upper(), index=False)
+        report('success', f"Saved cohort PO/IO rollup to {output_file}")
+    except Exception as e:
+        report('error', f"Error saving cohort rollup to {output_file}: {e}")
+    return output_file
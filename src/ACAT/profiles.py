@@ -0,0 +1,36 @@
+import hashlib
+import pandas as pd
+
+# Likert-scale CO vectors take few distinct values, so many students share the
+# same CO/PO/IO profile. Students are grouped by that profile (optionally
+# quantized to a step such as 0.5) and each group is assessed once.
+
+
+def profile_label(vector):
+    return f"profile-{hashlib.sha1(repr(vector).encode('utf-8')).hexdigest()[:10]}"
+
+
+def bucket_profiles(frames, student_ids, levels, quantum=None):
+    profile = pd.concat([frames[level].loc[student_ids] for level in levels], axis=1, keys=levels)
+    if quantum:
+        profile = (profile / quantum).round() * quantum
+    # Labels come from the profile's scores, not from the order groups are
+    # found in, so they (and the prompts and cache keys built from them) stay
+    # the same when students join or leave a section.
+    vectors = [tuple(float(value) for value in row) for row in profile.fillna(-1).to_numpy()]
+    buckets = pd.Series([profile_label(vector) for vector in vectors], index=profile.index, name='Profile Group')
+    first_in_bucket = ~buckets.duplicated().to_numpy()
+    labels = buckets[first_in_bucket].tolist()
+    # One frame per level, indexed by group label, in the shape the assessment
+    # stage expects for individual students.
+    bucket_frames = {level: profile.loc[first_in_bucket, level].set_axis(labels) for level in levels}
+    return buckets, bucket_frames
+
+
+def fan_out(buckets, bucket_rows):
+    rows_by_label = {row['SIS User ID']: row for row in bucket_rows}
+    assessments = []
+    for sid, label in buckets.items():
+        row = dict(rows_by_label[label], **{'SIS User ID': sid, 'Profile Group': label})
+        assessments.append(row)
+    return assessments
@@ -0,0 +1,85 @@
+import math
+from warehouse import student_key
+
+# Compact text encoding of outcome scores for LLM prompts. Instead of pasting
+# a Python dict repr (every long outcome name repeated, float noise such as
+# 3.6666666667), outcomes get short codes defined once in a legend and the
+# scores are written as a header-once pipe table with rounded values.
+#
+# Prompts are laid out legend first, student data last: the legend depends
+# only on the course/outcome set, so every student of a section (or every turn
+# of a chat) shares a byte-identical prefix that provider-side prompt caching
+# can reuse.
+
+LIKERT_NOTE = "Scores are on a 1-5 Likert scale (1 = below 60%, 5 = 90% or above); '-' means not assessed."
+
+
+def format_score(value, decimals=1):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return '-'
+    return f"{round(float(value), decimals):g}"
+
+
+def outcome_codes(names, prefix, keep_short=True):
+    # Names that are already short codes (PO1, IO3) keep their own name.
+    codes = {}
+    for i, name in enumerate(names):
+        text = str(name)
+        short = keep_short and len(text) <= 6 and ' ' not in text
+        codes[name] = text if short else f"{prefix}{i + 1}"
+    return codes
+
+
+def describe(name, max_words=None):
+    words = str(name).rstrip('.').split()
+    if max_words and len(words) > max_words:
+        words = words[:max_words] + ['...']
+    return ' '.join(words)
+
+
+def legend_lines(codes, max_words=None):
+    return [f"{code} {describe(name, max_words)}" for name, code in codes.items() if code != str(name)]
+
+
+def encode_level(scores, prefix, decimals=1, max_words=None):
+    # One student's scores at one level, e.g. {'COMP-101: Demonstrate ...': 4}.
+    # Returns (legend, table); legend is '' when every name is already short.
+    codes = outcome_codes(list(scores), prefix)
+    header = '|'.join(codes.values())
+    values = '|'.join(format_score(scores[name], decimals) for name in codes)
+    lines = legend_lines(codes, max_words)
+    legend = f"Legend ({prefix}):\n" + '\n'.join(lines) if lines else ''
+    return legend, f"{header}\n{values}"
+
+
+def encode_frame(frame, student_ids, prefix, decimals=1, max_words=None):
+    # Several students at one level: a "SIS User ID|CO1|CO2..." table.
+    codes = outcome_codes(list(frame.columns), prefix)
+    rows = ['|'.join(['SIS User ID'] + list(codes.values()))]
+    for sid, scores in zip(student_ids, frame.loc[student_ids].itertuples(index=False)):
+        rows.append('|'.join([student_key(sid)] + [format_score(value, decimals) for value in scores]))
+    lines = legend_lines(codes, max_words)
+    legend = f"Legend ({prefix}):\n" + '\n'.join(lines) if lines else ''
+    return legend, '\n'.join(rows)
+
+
+def encode_courses(courses_outcomes, decimals=1, max_words=None):
+    # A student's transcript, {course: {outcome name: score}}, as one row per
+    # course. Courses are sorted so the legend is identical from call to call;
+    # max_words shortens each outcome description in the legend.
+    courses = sorted(courses_outcomes)
+    codes = {course: outcome_codes(list(courses_outcomes[course]), 'O', keep_short=False) for course in courses}
+    width = max((len(course_codes) for course_codes in codes.values()), default=0)
+    legend = ["Legend:"]
+    for course in courses:
+        legend += [f"{course}:"] + legend_lines(codes[course], max_words)
+    rows = ['course|' + '|'.join(f"O{i + 1}" for i in range(width))]
+    for course in courses:
+        scores = courses_outcomes[course]
+        rows.append('|'.join([course] + [format_score(scores[name], decimals) for name in codes[course]]))
+    return '\n'.join(legend), '\n'.join(rows)
+
+
+def stable_prompt(legend, instructions, data):
+    # Shared part first, per-student part last.
+    return '\n\n'.join(part for part in (LIKERT_NOTE, legend, instructions, data) if part)
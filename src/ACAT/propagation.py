@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from reporting import report
+
+# Each level rolls the previous level's scores up through a mapping workbook.
+# Further levels (e.g. IO -> accreditation criteria) can be appended through
+# config['output']['extra_levels'] entries with the same keys.
+DEFAULT_LEVELS = [
+    {'level': 'po', 'mapping_file_key': 'co_po_mapping_file', 'key_column': 'Course Outcome', 'prefix': 'PO', 'per_course': True},
+    {'level': 'io', 'mapping_file_key': 'po_io_mapping_file', 'key_column': 'Program Outcome', 'prefix': 'IO', 'per_course': False},
+]
+
+
+class OutcomeMapping:
+    def __init__(self, sources, targets, weights):
+        self.sources = list(sources)
+        self.targets = list(targets)
+        self.weights = sparse.csr_array(weights)
+
+    @classmethod
+    def compile(cls, mapping_df, key_column, target_prefix, key_prefix=''):
+        if key_prefix:
+            mapping_df = mapping_df[mapping_df[key_column].astype(str).str.startswith(key_prefix)]
+        targets = [col for col in mapping_df.columns if str(col).startswith(target_prefix)]
+        keys = mapping_df[key_column].astype(str).str[len(key_prefix):]
+        sources = list(dict.fromkeys(keys))
+        source_index = {source: i for i, source in enumerate(sources)}
+        weights = mapping_df[targets].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=float)
+        rows, cols = np.nonzero(weights > 0)
+        # Duplicate mapping rows for the same source are summed by the COO -> CSR conversion.
+        row_sources = np.array([source_index[key] for key in keys], dtype=int)
+        matrix = sparse.coo_array(
+            (weights[rows, cols], (row_sources[rows], cols)),
+            shape=(len(sources), len(targets)),
+        )
+        return cls(sources, targets, matrix.tocsr())
+
+    @property
+    def empty(self):
+        return not self.sources
+
+    def propagate(self, scores, label=''):
+        missing = [source for source in self.sources if source not in scores.columns]
+        for source in missing:
+            report('warning', f"Warning: {source} not found in scores for {label}")
+        present = [i for i, source in enumerate(self.sources) if source in scores.columns]
+        weights = self.weights[present, :] if len(present) < len(self.sources) else self.weights
+        values = scores[[self.sources[i] for i in present]].to_numpy(dtype=float)
+
+        # Each student's target score is normalised by the weight of the source
+        # scores they actually have, so a blank score does not drag the average down.
+        observed = ~np.isnan(values)
+        numerator = (weights.T @ np.where(observed, values, 0.0).T).T
+        denominator = (weights.T @ observed.astype(float).T).T
+        result = np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+        # Targets with no mapped weight at all keep the historical 0.0 score.
+        unmapped = np.asarray(weights.sum(axis=0)).ravel() == 0
+        result[:, unmapped] = 0.0
+        return pd.DataFrame(result, index=scores.index, columns=self.targets)
+
+
+class PropagationEngine:
+    def __init__(self, levels):
+        self.levels = levels
+        self._compiled = {}
+
+    @classmethod
+    def from_config(cls, config, read_mapping):
+        output = config.get('output', {})
+        levels = []
+        for spec in DEFAULT_LEVELS + output.get('extra_levels', []):
+            mapping_file = spec.get('mapping_file') or output.get(spec.get('mapping_file_key', ''))
+            mapping_df = read_mapping(mapping_file, spec['key_column'], spec['prefix'])
+            if mapping_df is None:
+                break
+            levels.append(dict(spec, mapping=mapping_df))
+        return cls(levels)
+
+    @property
+    def level_names(self):
+        return [spec['level'] for spec in self.levels]
+
+    def mapping_for(self, index, course_name):
+        spec = self.levels[index]
+        key = (index, course_name if spec.get('per_course') else None)
+        if key not in self._compiled:
+            key_prefix = f"{course_name}: " if spec.get('per_course') else ''
+            self._compiled[key] = OutcomeMapping.compile(spec['mapping'], spec['key_column'], spec['prefix'], key_prefix)
+        return self._compiled[key]
+
+    def run(self, co_scores, course_name):
+        frames = {}
+        scores = co_scores
+        for index, spec in enumerate(self.levels):
+            mapping = self.mapping_for(index, course_name)
+            if mapping.empty:
+                report('warning', f"Warning: No {spec['key_column']} mappings to {spec['prefix']} found for course {course_name}")
+                break
+            scores = mapping.propagate(scores, course_name)
+            scores.index.name = co_scores.index.name
+            frames[spec['level']] = scores
+        return frames
@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    # Shared limiter for concurrent LLM calls: refills at rate_per_minute / 60
+    # tokens per second and holds at most `capacity` tokens, so bursts never
+    # exceed what the agents' max_rpm allows.
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(rate_per_minute // 60) or 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens=1):
+        # Requests larger than the bucket are allowed to drain it completely
+        # rather than wait forever.
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
@@ -0,0 +1,87 @@
+import json
+import re
+from parse_cache import read_excel_cached
+from reporting import report
+from uploads import read_uploaded
+
+
+def safe_read_excel(filepath):
+    try:
+        df = read_uploaded(filepath)
+        if df is None:
+            df = read_excel_cached(filepath)
+        if df.empty:
+            report('error', f"Error: Excel file {filepath} is empty")
+            return None
+        return df
+    except FileNotFoundError:
+        report('error', f"Error: File not found - {filepath}")
+    except Exception as e:
+        report('error', f"Error reading {filepath}: {e}")
+    return None
+
+def check_config(config):
+    if not config.get('courses'):
+        report('error', "Error: No courses found in configuration")
+        return {}
+    return config
+
+def load_config(config_path):
+    try:
+        with open(config_path, 'r') as file:
+            return check_config(json.load(file))
+    except FileNotFoundError:
+        report('error', f"Error: Config file not found - {config_path}")
+    except json.JSONDecodeError as e:
+        report('error', f"Error decoding JSON from config file: {e}")
+    return {}
+
+def parse_config(data):
+    # Same as load_config, for a config already in memory (e.g. an upload).
+    try:
+        return check_config(json.loads(data))
+    except json.JSONDecodeError as e:
+        report('error', f"Error decoding JSON from config file: {e}")
+    return {}
+
+def read_outcomes(outcomes_file):
+    df = safe_read_excel(outcomes_file)
+    if df is None:
+        return []
+    df.columns = [col.strip() for col in df.columns]
+    co_cols = [col for col in df.columns if col.lower() == 'course outcome']
+    if not co_cols:
+        report('warning', f"Warning: 'Course Outcome' column not found in {outcomes_file}")
+        return []
+    outcomes = df[co_cols[0]].dropna().tolist()
+    return outcomes
+
+def read_assignments(assignments_file, outcomes):
+    df = safe_read_excel(assignments_file)
+    if df is None:
+        return {}
+    df.columns = [str(col).strip() for col in df.columns]
+    assignments = {}
+    for outcome in outcomes:
+        row_matches = df[df.iloc[:, 0] == outcome]
+        if not row_matches.empty:
+            assignment_names = row_matches.iloc[0, 1:].dropna().tolist()
+            assignments[outcome] = assignment_names
+    return assignments
+
+def read_grades(grades_file, required_columns):
+    df = safe_read_excel(grades_file)
+    if df is None:
+        return {}
+    cleaned_columns = {
+        col: re.sub(r"\s*\(.*?\)", "", str(col)).strip()
+        for col in df.columns
+    }
+    df.rename(columns=cleaned_columns, inplace=True)
+    if 'SIS User ID' not in df.columns:
+        report('error', f"Error: 'SIS User ID' column missing in grades file {grades_file}")
+        return {}
+    relevant_columns = ['SIS User ID'] + [col for col in required_columns if col in df.columns]
+    df = df[relevant_columns].dropna(subset=['SIS User ID'])
+    df.set_index('SIS User ID', inplace=True)
+    return df.to_dict(orient='index')
@@ -0,0 +1,35 @@
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# A background job has no Streamlit page to write to; it captures its
+# messages instead (see jobs.JobQueue).
+_capture = ContextVar('report_capture', default=None)
+
+
+def report(level, message):
+    # Print always, and mirror to the active capture or, failing that, to the
+    # dashboard when running under Streamlit.
+    print(message)
+    forward(level, message)
+
+
+def forward(level, message):
+    # The mirroring half of report(), for messages already printed elsewhere,
+    # such as those a worker process collected (see batch.process_section_collecting).
+    capture = _capture.get()
+    if capture is not None:
+        capture(level, message)
+        return
+    st = sys.modules.get('streamlit')
+    if st is not None:
+        getattr(st, level)(message)
+
+
+@contextmanager
+def capture_reports(sink):
+    token = _capture.set(sink)
+    try:
+        yield
+    finally:
+        _capture.reset(token)
@@ -1,5 +1,6 @@
 import os
 import pandas as pd
+from outcomes_index import OutcomesIndex
  
 def extract_student_outcomes_for_all_courses(student_id: int = 11) -> dict:
     courses_outcomes = {}
@@ -12,25 +13,26 @@ def extract_student_outcomes_for_all_courses(student_id: int = 11) -> dict:
         print(f"❌ Folder {assessment_results_dir} does not exist.")
         return courses_outcomes
  
-    for file_name in os.listdir(assessment_results_dir):
-        if file_name.endswith("_outcomes.xlsx"):
-            course_code = file_name.split("_")[0]
-            file_path = os.path.join(assessment_results_dir, file_name)
+    # One indexed lookup instead of parsing every results workbook; the index
+    # re-reads only workbooks that changed since the last call.
+    index = OutcomesIndex(assessment_results_dir)
+    index.refresh()
+    courses_outcomes = index.student(student_id)
+    if not courses_outcomes:
+        print(f"No data found for student {student_id} in {assessment_results_dir}")
  
-            try:
-                df = pd.read_excel(file_path)
-                student_row = df[df.iloc[:, 0] == student_id]
- 
-                if not student_row.empty:
-                    outcome_dict = student_row.iloc[0, 1:].to_dict()
-                    courses_outcomes[course_code] = outcome_dict
-                else:
-                    print(f"No data found for student {student_id} in course {course_code}")
+    return courses_outcomes
  
-            except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
+def outcomes_index() -> OutcomesIndex:
+    # The refreshed index over assessment_results/, for SQL-level queries.
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    index = OutcomesIndex(os.path.join(base_dir, "assessment_results"))
+    index.refresh()
+    return index
  
-    return courses_outcomes
+def extract_all_student_transcripts(student_ids=None) -> pd.DataFrame:
+    # Bulk variant: students x (course, outcome) Likert matrix in one call.
+    return outcomes_index().transcripts(student_ids)
  
 # Optional: Test
 if __name__ == "__main__":
@@ -0,0 +1,9 @@
+import math
+
+# Prompt size estimate shared by the batch planner and the chat window. Kept
+# dependency-free so the chat loop does not import the assessment stack.
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text and numbers.
+    return math.ceil(len(text) / 4)
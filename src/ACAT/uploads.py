@@ -0,0 +1,87 @@
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+import pandas as pd
+from reporting import report
+
+# Workbooks uploaded through the dashboard are parsed once, straight from
+# their in-memory buffers, and stand in for the config paths with the same
+# file name while a run is active (see use_uploads). Nothing is written to
+# disk, and concurrent sessions never see each other's uploads because the
+# active set is scoped to the context that runs the job.
+_active = ContextVar('uploaded_workbooks', default=None)
+
+
+class UploadedWorkbooks:
+    def __init__(self, files):
+        # files: (name, bytes) pairs, e.g. from st.file_uploader.
+        self.frames = {}
+        self.digests = {}
+        for name, data in files:
+            name = os.path.basename(name)
+            try:
+                self.frames[name] = pd.read_excel(io.BytesIO(data))
+            except Exception as e:
+                report('error', f"Error reading uploaded file {name}: {e}")
+                continue
+            self.digests[name] = hashlib.sha1(data).hexdigest()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def names(self):
+        return sorted(self.frames)
+
+    def read(self, path):
+        df = self.frames.get(os.path.basename(path)) if path else None
+        # Readers rename and filter columns in place.
+        return None if df is None else df.copy()
+
+    def digest(self, path):
+        return self.digests.get(os.path.basename(path)) if path else None
+
+    def match(self, config):
+        # (uploaded, on_disk, missing) config paths, so the dashboard can say
+        # which entries the uploads cover before the run starts.
+        uploaded, on_disk, missing = [], [], []
+        for path in config_paths(config):
+            if os.path.basename(path) in self.frames:
+                uploaded.append(path)
+            elif os.path.exists(path):
+                on_disk.append(path)
+            else:
+                missing.append(path)
+        return uploaded, on_disk, missing
+
+
+def config_paths(config):
+    paths = []
+    for course in config.get('courses', []):
+        paths.append(course.get('outcomes_file'))
+        for section_data in course.get('sections', []):
+            paths += [section_data.get('assignments_file'), section_data.get('grades_file')]
+    output = config.get('output', {})
+    paths += [output.get('co_po_mapping_file'), output.get('po_io_mapping_file')]
+    paths += [level.get('mapping_file') for level in output.get('extra_levels', [])]
+    return list(dict.fromkeys(path for path in paths if path))
+
+
+@contextmanager
+def use_uploads(workbooks):
+    token = _active.set(workbooks)
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+def read_uploaded(path):
+    workbooks = _active.get()
+    return workbooks.read(path) if workbooks is not None else None
+
+
+def uploaded_digest(path):
+    workbooks = _active.get()
+    return workbooks.digest(path) if workbooks is not None else None
@@ -0,0 +1,138 @@
+import os
+from contextlib import contextmanager
+import sqlite3
+import pandas as pd
+
+WAREHOUSE_FILE = 'acat_warehouse.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    section_id INTEGER PRIMARY KEY,
+    course TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    section TEXT NOT NULL,
+    UNIQUE (course, semester, section)
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    outcome_id INTEGER PRIMARY KEY,
+    level TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    UNIQUE (level, outcome)
+);
+CREATE TABLE IF NOT EXISTS scores (
+    student TEXT NOT NULL,
+    section_id INTEGER NOT NULL REFERENCES sections (section_id),
+    outcome_id INTEGER NOT NULL REFERENCES outcomes (outcome_id),
+    score REAL,
+    PRIMARY KEY (student, section_id, outcome_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sections_course_semester ON sections (course, semester);
+CREATE INDEX IF NOT EXISTS idx_sections_semester ON sections (semester);
+CREATE INDEX IF NOT EXISTS idx_scores_section_outcome ON scores (section_id, outcome_id);
+CREATE INDEX IF NOT EXISTS idx_scores_outcome ON scores (outcome_id);
+CREATE VIEW IF NOT EXISTS outcome_scores AS
+    SELECT sc.student, se.course, se.semester, se.section, o.level, o.outcome, sc.score
+    FROM scores sc
+    JOIN sections se ON se.section_id = sc.section_id
+    JOIN outcomes o ON o.outcome_id = sc.outcome_id;
+"""
+
+
+def warehouse_path(config):
+    output = config.get('output', {})
+    return output.get('warehouse_file') or os.path.join(output.get('database_folder', 'db'), WAREHOUSE_FILE)
+
+
+def student_key(student_id):
+    # Excel hands SIS ids back as floats (11.0); store them as "11".
+    if isinstance(student_id, float) and student_id.is_integer():
+        return str(int(student_id))
+    return str(student_id)
+
+
+class Warehouse:
+    # One SQLite database for every course, semester, section and outcome level,
+    # so cross-course questions are a single query against the outcome_scores view.
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.transaction() as conn:
+            conn.executescript(SCHEMA)
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _section_id(conn, course, semester, section):
+        conn.execute(
+            'INSERT OR IGNORE INTO sections (course, semester, section) VALUES (?, ?, ?)',
+            (course, semester, section),
+        )
+        return conn.execute(
+            'SELECT section_id FROM sections WHERE course = ? AND semester = ? AND section = ?',
+            (course, semester, section),
+        ).fetchone()[0]
+
+    @staticmethod
+    def _outcome_ids(conn, level, outcomes):
+        conn.executemany(
+            'INSERT OR IGNORE INTO outcomes (level, outcome) VALUES (?, ?)',
+            [(level, outcome) for outcome in outcomes],
+        )
+        rows = conn.execute('SELECT outcome, outcome_id FROM outcomes WHERE level = ?', (level,)).fetchall()
+        return dict(rows)
+
+    def upsert_section(self, course, semester, section, frames):
+        # Replaces every level of one section in a single transaction; students
+        # who left the section disappear with the old rows.
+        with self.transaction() as conn:
+            section_id = self._section_id(conn, course, semester, section)
+            for level, scores in frames.items():
+                if scores is None:
+                    continue
+                outcome_ids = self._outcome_ids(conn, level, [str(col) for col in scores.columns])
+                conn.execute(
+                    'DELETE FROM scores WHERE section_id = ? AND outcome_id IN '
+                    '(SELECT outcome_id FROM outcomes WHERE level = ?)',
+                    (section_id, level),
+                )
+                long_scores = scores.rename_axis('student').reset_index().melt(
+                    id_vars='student', var_name='outcome', value_name='score'
+                ).dropna(subset=['score'])
+                conn.executemany(
+                    'INSERT INTO scores (student, section_id, outcome_id, score) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (student, section_id, outcome_id) DO UPDATE SET score = excluded.score',
+                    [
+                        (student_key(student), section_id, outcome_ids[str(outcome)], float(score))
+                        for student, outcome, score in long_scores.itertuples(index=False)
+                    ],
+                )
+
+    def query(self, sql, params=()):
+        with self.transaction() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def outcome_scores(self, level=None, course=None, semester=None, student=None):
+        clauses, params = [], []
+        for column, value in (('level', level), ('course', course), ('semester', semester), ('student', student)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(student_key(value) if column == 'student' else value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self.query(f"SELECT * FROM outcome_scores{where}", params)
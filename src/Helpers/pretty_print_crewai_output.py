@@ -7,13 +7,14 @@ from rich.console import Console
 from rich.table import Table
 from rich.markdown import Markdown
 import json
+import src.acat_path  # noqa: F401  (puts src/ACAT on sys.path)
+from llm_telemetry import price_for
 
-def display_crew_output(crew_output):
+def display_crew_output(crew_output, model="gpt-4o"):
     console = Console()
 
-    # GPT-4o pricing
-    INPUT_TOKEN_COST = 2.5/1e6   # Cost per input token in USD
-    OUTPUT_TOKEN_COST = 10.0/1e6 # Cost per output token in USD
+    # Per-token pricing (USD) for the model that produced the output
+    INPUT_TOKEN_COST, OUTPUT_TOKEN_COST = price_for(model)
 
     # Raw Output
     console.print(f"[bold yellow]Raw Output:[/bold yellow] {crew_output.raw}\n")
@@ -15,6 +15,9 @@ from crewai.knowledge.source.excel_knowledge_source import ExcelKnowledgeSource
 from src.Agents.assignment_agent import AssignmentAgent
 from src.Agents.course_outcomes_agent import CourseOutcomesAgent
 from src.Helpers.pretty_print_crewai_output import display_crew_output
+import src.acat_path  # noqa: F401  (puts src/ACAT on sys.path)
+from llm_client import chat_model
+from llm_telemetry import langchain_callback
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -28,10 +31,11 @@ if not logger.hasHandlers():
 
 
 
-gpt_4o_high_tokens = lang_oai.ChatOpenAI(
+gpt_4o_high_tokens = chat_model(
     model_name="gpt-4o",
     temperature=0.0,
-    max_tokens=1500
+    max_tokens=1500,
+    callbacks=[langchain_callback()]
 )
 class CourseOutcomesCrew:
     run()
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The ACAT modules import each other by bare name, since they run as scripts
+# from src/ACAT. Code elsewhere under src imports them the same way after
+# importing this module, so both sides share one instance of stateful modules
+# such as llm_telemetry and llm_client.
+ACAT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ACAT')
+if ACAT_DIR not in sys.path:
+    sys.path.insert(0, ACAT_DIR)
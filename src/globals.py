@@ -1,10 +1,14 @@
-import langchain_openai as lang_oai
+import src.acat_path  # noqa: F401  (puts src/ACAT on sys.path)
+from llm_client import chat_model
+from llm_telemetry import langchain_callback
 
 
 
 
 # LLM Models
-gpt_4o_llm = lang_oai.ChatOpenAI(
+# chat_model() builds a LangChain ChatOpenAI on the shared, pooled HTTP client
+# (timeouts, jittered backoff on 429/5xx and a circuit breaker; see llm_client).
+gpt_4o_llm = chat_model(
     # The model name to use, like GPT-3.5 or GPT-4
     model_name="gpt-4o",  
     
@@ -61,7 +65,7 @@ gpt_4o_llm = lang_oai.ChatOpenAI(
     # Custom API base URL, useful when working with proxies or custom setups.
     #openai_api_base="https://api.openai.com/v1",  
     
-    # Allows specifying a timeout in seconds for requests to the OpenAI API.
+    # Request timeouts and retries come from the shared client (llm_client.configure).
     # request_timeout=30.0,  
     
     # The OpenAI organization to which the API key belongs. Optional.
@@ -69,4 +73,7 @@ gpt_4o_llm = lang_oai.ChatOpenAI(
     
     # Specify a proxy server for routing API requests. Useful in restricted environments.
     #proxy="http://your-proxy-server:port"  
+
+    # Records tokens, latency and cost of every call in the shared LLM telemetry.
+    callbacks=[langchain_callback()],
 )
\ No newline at end of file
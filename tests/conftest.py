@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The ACAT modules import each other by bare name, as they do when run from
+# src/ACAT (python batch.py, streamlit run run_acat.py).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'ACAT'))
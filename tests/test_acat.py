@@ -0,0 +1,36 @@
+import numpy as np
+from acat import ACAT
+
+
+def loop_course_outcomes(outcomes, student_data):
+    # The per-student loop compute_course_outcomes replaced.
+    result = {}
+    for student_id, grades in student_data.items():
+        result[student_id] = {}
+        for outcome, criteria in outcomes.items():
+            scores = [grades[criterion] for criterion in criteria if criterion in grades]
+            average = sum(scores) / len(scores) if scores else 0
+            result[student_id][outcome] = ACAT.to_likert(average)
+    return result
+
+
+def test_matrix_matches_the_per_student_loop():
+    rng = np.random.default_rng(7)
+    assignments = [f"A{i}" for i in range(12)]
+    outcomes = {f"CO{j}": list(rng.choice(assignments, size=int(rng.integers(1, 5)), replace=False))
+                for j in range(6)}
+    outcomes['CO6'] = ['A0', 'A0', 'A3']
+    outcomes['CO7'] = ['Not graded']
+    student_data = {}
+    for sid in range(40):
+        grades = {name: float(rng.integers(40, 101)) for name in assignments if rng.random() > 0.15}
+        if sid % 7 == 0:
+            grades['A3'] = np.nan
+        student_data[str(1000 + sid)] = grades
+    acat = ACAT('COMP-101', 'FA24', '01', outcomes, student_data)
+    assert acat.compute_course_outcomes() == loop_course_outcomes(outcomes, student_data)
+
+
+def test_likert_thresholds():
+    scores = [0, 59.9, 60, 69.99, 70, 80, 89.5, 90, 100, np.nan]
+    assert list(ACAT.to_likert_array(scores)) == [ACAT.to_likert(score) for score in scores]
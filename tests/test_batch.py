@@ -0,0 +1,96 @@
+import batch
+import pytest
+from reporting import capture_reports, report
+
+
+def sample_config(tmp_path, sections=4, max_tokens=None):
+    courses = [{
+        'course_name': f"COMP-{100 + number}",
+        'semester': 'FA24',
+        'outcomes_file': str(tmp_path / f"COMP-{100 + number}_outcomes.xlsx"),
+        'sections': [{'section': '01', 'grades_file': str(tmp_path / f"COMP-{100 + number}_grades.xlsx")}],
+    } for number in range(sections)]
+    config = {'courses': courses, 'output': {'state_folder': str(tmp_path / 'state')}}
+    if max_tokens is not None:
+        config['llm'] = {'telemetry': {'max_tokens': max_tokens}}
+    return config
+
+
+# Stand-ins for process_section; module level so worker processes can unpickle them.
+def spending_section(config, course_name, semester, outcomes_file, section_data, *args, **kwargs):
+    return {'section': f"{course_name}_{semester}_{section_data['section']}", 'status': 'ok', 'llm_tokens': 10, 'llm_cost': 0.0}
+
+
+def budget_section(config, course_name, semester, outcomes_file, section_data, engine, export, run_llm, stages, state_folder,
+                   budget=None):
+    return dict(spending_section(config, course_name, semester, outcomes_file, section_data), budget=budget)
+
+
+def reporting_section(config, course_name, semester, outcomes_file, section_data, *args, **kwargs):
+    report('warning', f"{course_name}: 2 students without grades")
+    if course_name == 'COMP-101':
+        raise RuntimeError("broken workbook")
+    return spending_section(config, course_name, semester, outcomes_file, section_data)
+
+
+def failing_section(config, course_name, semester, outcomes_file, section_data, *args, **kwargs):
+    if course_name == 'COMP-101':
+        raise RuntimeError("broken workbook")
+    return spending_section(config, course_name, semester, outcomes_file, section_data)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_budget_stops_further_sections(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(batch, 'process_section', spending_section)
+    # Each section spends 10 tokens; the ceiling is reached after the second.
+    results = batch.run_batch(sample_config(tmp_path, sections=6, max_tokens=15), workers=workers, export=False, run_llm=True)
+    statuses = [timings['status'] for timings in results]
+    assert statuses.count('ok') == 2
+    assert statuses.count('skipped') == 4
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_cancel_stops_further_sections(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(batch, 'process_section', spending_section)
+    finished = []
+
+    def progress(stem, status, timings=None):
+        if status == 'ok':
+            finished.append(stem)
+
+    results = batch.run_batch(sample_config(tmp_path, sections=6), workers=workers, export=False,
+                              progress=progress, cancelled=lambda: len(finished) >= 1)
+    statuses = [timings['status'] for timings in results]
+    assert len(results) == 6
+    assert set(statuses) == {'ok', 'cancelled'}
+    assert statuses.count('ok') <= workers
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_failing_section_does_not_stop_the_run(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(batch, 'process_section', failing_section)
+    config = sample_config(tmp_path, sections=4)
+    statuses = {timings['section']: timings['status'] for timings in batch.run_batch(config, workers=workers, export=False)}
+    assert statuses == {'COMP-100_FA24_01': 'ok', 'COMP-101_FA24_01': 'failed', 'COMP-102_FA24_01': 'ok', 'COMP-103_FA24_01': 'ok'}
+    recorded = batch.Manifest(config['output']['state_folder']).sections
+    assert sorted(recorded) == ['COMP-100_FA24_01', 'COMP-102_FA24_01', 'COMP-103_FA24_01']
+
+
+def test_parallel_sections_share_the_remaining_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, 'process_section', budget_section)
+    results = batch.run_batch(sample_config(tmp_path, sections=2, max_tokens=100), workers=2, export=False, run_llm=True)
+    shares = [timings['budget']['max_tokens'] for timings in results]
+    assert shares == [50, 50]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_section_messages_reach_the_capture(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(batch, 'process_section', reporting_section)
+    captured = []
+    with capture_reports(lambda level, message: captured.append((level, message))):
+        batch.run_batch(sample_config(tmp_path, sections=2), workers=workers, export=False)
+    assert {
+        ('warning', "COMP-100: 2 students without grades"),
+        ('warning', "COMP-101: 2 students without grades"),
+        ('error', "Error processing COMP-101_FA24_01: broken workbook"),
+    } <= set(captured)
@@ -0,0 +1,18 @@
+import pytest
+from batched_prompts import parse_batch_output
+
+
+def test_parse_batch_output_maps_students():
+    raw = 'Here you go:\n```json\n{"assessments": [{"student": "101", "assessment": "Strong"}, {"student": "102", "assessment": "Weak"}]}\n```'
+    assert parse_batch_output(raw, [101, 102]) == {101: "Strong", 102: "Weak"}
+
+
+def test_parse_batch_output_omits_missing_students():
+    raw = '{"assessments": [{"student": "101", "assessment": "Strong"}, {"student": "103", "assessment": ""}]}'
+    assert parse_batch_output(raw, [101, 102, 103]) == {101: "Strong"}
+
+
+@pytest.mark.parametrize('raw', ['', 'no json here', '{"assessments": [{"student": "101"}]}'])
+def test_parse_batch_output_rejects_malformed_answers(raw):
+    with pytest.raises(ValueError):
+        parse_batch_output(raw, [101])
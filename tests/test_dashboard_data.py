@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('streamlit')
+from dashboard_data import FACT_COLUMNS, FACT_INDEX, query_facts
+
+
+@pytest.fixture
+def facts():
+    rows = [
+        ('co', 'COMP-101', 'FA24', '01', '1', 'Design', 4.0),
+        ('co', 'COMP-101', 'FA24', '02', '2', 'Design', 2.0),
+        ('co', 'COMP-103', 'SP25', '01', '1', 'Test', 5.0),
+        ('po', 'COMP-101', 'FA24', '01', '1', 'PO1', 3.5),
+    ]
+    return pd.DataFrame(rows, columns=FACT_COLUMNS).set_index(FACT_INDEX).sort_index()
+
+
+def test_query_facts_slices_on_the_index(facts):
+    assert len(query_facts(facts, 'co')) == 3
+    assert list(query_facts(facts, 'co', course='COMP-101', section='02')['student']) == ['2']
+    assert list(query_facts(facts, 'co', semester='SP25')['outcome']) == ['Test']
+    assert list(query_facts(facts, 'po')['score']) == [3.5]
+
+
+def test_query_facts_filters_outcome_and_score(facts):
+    assert list(query_facts(facts, 'co', outcome='Design', score_range=(3, 5))['student']) == ['1']
+
+
+def test_query_facts_unknown_key_is_empty(facts):
+    result = query_facts(facts, 'io')
+    assert result.empty
+    assert list(result.columns) == FACT_COLUMNS
@@ -0,0 +1,13 @@
+import pandas as pd
+from dashboard_views import LIKERT_EDGES, wide_histogram
+
+
+def test_wide_histogram_bins_likert_levels_and_skips_the_id_column():
+    df = pd.DataFrame({'SIS User ID': [1001, 1002, 1003], 'CO1': [1, 5, 5], 'CO2': [3.4, 3.6, None]})
+    counts = wide_histogram(df, edges=LIKERT_EDGES)
+    assert set(counts['outcome']) == {'CO1', 'CO2'}
+    co1 = counts[counts['outcome'] == 'CO1'].set_index('bin_left')['count']
+    assert co1.to_dict() == {0.5: 1, 4.5: 2}
+    co2 = counts[counts['outcome'] == 'CO2'].set_index('bin_left')['count']
+    assert co2.to_dict() == {2.5: 1, 3.5: 1}
+    assert counts['bin_right'].max() == 5.5
@@ -0,0 +1,62 @@
+import pandas as pd
+from incremental import Manifest, save_co_frame
+
+
+def setup_section(tmp_path):
+    files = {}
+    for name in ('outcomes', 'assignments', 'grades', 'co_po', 'po_io'):
+        files[name] = tmp_path / f"{name}.xlsx"
+        files[name].write_bytes(name.encode())
+    config = {'output': {'co_po_mapping_file': str(files['co_po']), 'po_io_mapping_file': str(files['po_io'])}}
+    section = {'assignments_file': str(files['assignments']), 'grades_file': str(files['grades'])}
+    return files, config, section
+
+
+def digests(state, config, files, section, options=None):
+    return Manifest(state).section_digests(config, str(files['outcomes']), section, options or {})
+
+
+def test_stale_stages_follow_the_dependency_graph(tmp_path):
+    files, config, section = setup_section(tmp_path)
+    state = str(tmp_path / 'state')
+    manifest = Manifest(state)
+    first = manifest.section_digests(config, str(files['outcomes']), section, {})
+    assert manifest.stale_stages('S', first) == ('co', 'rollup')
+
+    manifest.record('S', first)
+    save_co_frame(state, 'S', pd.DataFrame({'CO1': [5]}))
+    manifest.save()
+    assert Manifest(state).stale_stages('S', digests(state, config, files, section)) == ()
+
+    # Options and mapping files only feed the rollup.
+    assert Manifest(state).stale_stages('S', digests(state, config, files, section, {'run_llm': True})) == ('rollup',)
+    files['po_io'].write_bytes(b'changed')
+    assert Manifest(state).stale_stages('S', digests(state, config, files, section)) == ('rollup',)
+
+    files['grades'].write_bytes(b'changed')
+    assert Manifest(state).stale_stages('S', digests(state, config, files, section)) == ('co', 'rollup')
+
+
+def test_missing_co_frame_rebuilds_the_section(tmp_path):
+    files, config, section = setup_section(tmp_path)
+    state = str(tmp_path / 'state')
+    manifest = Manifest(state)
+    recorded = manifest.section_digests(config, str(files['outcomes']), section, {})
+    manifest.record('S', recorded)
+    manifest.save()
+    assert Manifest(state).stale_stages('S', recorded) == ('co', 'rollup')
+
+
+def test_deleted_export_output_reruns_the_rollup(tmp_path):
+    files, config, section = setup_section(tmp_path)
+    state = str(tmp_path / 'state')
+    workbook = tmp_path / 'S_po_outcomes.xlsx'
+    workbook.write_bytes(b'exported')
+    manifest = Manifest(state)
+    recorded = manifest.section_digests(config, str(files['outcomes']), section, {})
+    manifest.record('S', recorded, [str(workbook)])
+    save_co_frame(state, 'S', pd.DataFrame({'CO1': [5]}))
+    manifest.save()
+    assert Manifest(state).stale_stages('S', recorded) == ()
+    workbook.unlink()
+    assert Manifest(state).stale_stages('S', recorded) == ('rollup',)
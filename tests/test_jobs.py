@@ -0,0 +1,36 @@
+import os
+import time
+import jobs
+
+
+def wait_for(queue, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while queue.job(job_id)['status'] in jobs.ACTIVE and time.time() < deadline:
+        time.sleep(0.05)
+    return queue.job(job_id)
+
+
+def test_failed_run_records_error_and_closes_sections(tmp_path, monkeypatch):
+    def broken_batch(config, progress, **kwargs):
+        progress('COMP-100_FA24_01', 'pending')
+        progress('COMP-100_FA24_01', 'running')
+        raise RuntimeError("mapping file unreadable")
+
+    monkeypatch.setattr(jobs, 'run_batch', broken_batch)
+    queue = jobs.JobQueue(str(tmp_path / 'jobs.db'))
+    job = wait_for(queue, queue.submit({'courses': [], 'output': {'excel_folder': str(tmp_path / 'out')}}))
+    assert job['status'] == 'failed'
+    assert queue.messages(job['id']) == [('error', f"Job {job['id']} failed: mapping file unreadable")]
+    assert [section['status'] for section in queue.sections(job['id'])] == ['failed']
+
+
+def test_only_jobs_of_exited_servers_are_interrupted(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    queue = jobs.JobQueue(db_path)
+    with queue.transaction() as conn:
+        for job_id, pid in (('live', os.getpid()), ('gone', 2 ** 22 + 1)):
+            conn.execute("INSERT INTO jobs (id, status, config, options, host, pid, created) VALUES (?, 'running', '{}', '{}', ?, ?, ?)",
+                         (job_id, queue.host, pid, time.time()))
+    restarted = jobs.JobQueue(db_path)
+    assert restarted.job('live')['status'] == 'running'
+    assert restarted.job('gone')['status'] == 'interrupted'
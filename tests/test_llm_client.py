@@ -0,0 +1,56 @@
+import pytest
+
+httpx = pytest.importorskip('httpx')
+import llm_client
+from llm_client import DEFAULT_SETTINGS, CircuitBreaker, CircuitOpen, ResilientTransport, _RetryPolicy
+
+
+def transport_for(handler, breaker, max_retries=4):
+    settings = dict(DEFAULT_SETTINGS, max_retries=max_retries, backoff_base=0.0, backoff_max=0.0)
+    return ResilientTransport(httpx.MockTransport(handler), _RetryPolicy(settings, breaker))
+
+
+def test_exhausted_retries_count_as_one_breaker_failure():
+    calls = []
+
+    def unavailable(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    breaker = CircuitBreaker(failure_threshold=5)
+    client = httpx.Client(transport=transport_for(unavailable, breaker))
+    assert client.get('http://llm.test/v1/models').status_code == 503
+    assert len(calls) == 5
+    assert breaker.failures == 1
+    assert breaker.state == 'closed'
+
+
+def test_retried_success_resets_the_breaker():
+    statuses = iter([429, 502, 200])
+    breaker = CircuitBreaker(failure_threshold=5)
+    breaker.failures = 3
+    client = httpx.Client(transport=transport_for(lambda request: httpx.Response(next(statuses)), breaker))
+    assert client.get('http://llm.test/v1/models').status_code == 200
+    assert breaker.failures == 0
+
+
+def test_transport_errors_after_retries_open_the_circuit():
+    def unreachable(request):
+        raise httpx.ConnectError("refused")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+    client = httpx.Client(transport=transport_for(unreachable, breaker, max_retries=1))
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            client.get('http://llm.test/v1/models')
+    with pytest.raises(CircuitOpen):
+        client.get('http://llm.test/v1/models')
+
+
+def test_half_open_message_never_reports_negative_wait(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1.0)
+    breaker.record_failure()
+    monkeypatch.setattr(llm_client.time, 'monotonic', lambda: breaker.opened_at + 5.0)
+    breaker.before_call()  # the half-open trial call
+    with pytest.raises(CircuitOpen, match=r"retrying in 0s"):
+        breaker.before_call()
@@ -0,0 +1,28 @@
+import pytest
+from llm_telemetry import BudgetExceeded, Telemetry, langchain_callback
+
+
+def test_transport_retries_are_counted_on_the_tracked_call():
+    httpx = pytest.importorskip('httpx')
+    from llm_client import DEFAULT_SETTINGS, CircuitBreaker, ResilientTransport, _RetryPolicy
+    statuses = iter([429, 503, 200])
+    settings = dict(DEFAULT_SETTINGS, backoff_base=0.0, backoff_max=0.0)
+    transport = ResilientTransport(httpx.MockTransport(lambda request: httpx.Response(next(statuses))),
+                                   _RetryPolicy(settings, CircuitBreaker()))
+    telemetry = Telemetry()
+    with telemetry.track('chat', 'gpt-4.1'):
+        assert httpx.Client(transport=transport).get('http://llm.test/v1/models').status_code == 200
+    assert telemetry.records[0]['retries'] == 2
+    assert telemetry.summary()['chat']['retries'] == 2
+
+
+def test_langchain_call_over_the_ceiling_is_refused():
+    pytest.importorskip('langchain_core')
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    telemetry = Telemetry(max_tokens=10)
+    model = FakeListChatModel(responses=['fine', 'fine'], callbacks=[langchain_callback(telemetry)])
+    assert model.invoke('hello').content == 'fine'
+    telemetry.total_tokens = 10
+    with pytest.raises(BudgetExceeded):
+        model.invoke('hello again')
+    assert len(telemetry.records) == 1
@@ -0,0 +1,25 @@
+from outcome_retrieval import OutcomeRetriever, parse_question
+
+
+class FakeIndex:
+    def __init__(self):
+        self.queries = []
+
+    def catalog(self):
+        return [('COMP-301', 0, 'Design algorithms.'), ('COMP-301', 1, 'Analyze complexity.')]
+
+    def scores(self, outcomes, students=None, op=None, value=None):
+        self.queries.append(outcomes)
+        raise AssertionError('no data should be retrieved')
+
+
+def test_unknown_course_like_phrases_are_ignored():
+    parsed = parse_question("Explain it in more than 100 words, like COMP 301 CO2", {'COMP-301'})
+    assert parsed['courses'] == ['COMP-301']
+    assert parse_question("more than 100")['courses'] == ['THAN-100']
+
+
+def test_course_like_phrase_does_not_make_a_question_data_bearing():
+    index = FakeIndex()
+    assert OutcomeRetriever(index).retrieve("Give me design tips 101") == ''
+    assert index.queries == []
@@ -0,0 +1,26 @@
+import os
+import pandas as pd
+from outcomes_index import OutcomesIndex
+
+
+def write_results(folder, name, scores):
+    pd.DataFrame(scores).to_excel(os.path.join(folder, name), index=False)
+
+
+def test_refresh_reindexes_changed_files_and_drops_deleted_ones(tmp_path):
+    write_results(tmp_path, 'COMP-101_FA24_01_outcomes.xlsx', {'SIS User ID': [1, 2], 'Design': [4, 5]})
+    write_results(tmp_path, 'COMP-103_FA24_01_outcomes.xlsx', {'SIS User ID': [1], 'Test': [3]})
+    index = OutcomesIndex(str(tmp_path))
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+    assert index.student(1) == {'COMP-101': {'Design': 4}, 'COMP-103': {'Test': 3}}
+
+    write_results(tmp_path, 'COMP-101_FA24_01_outcomes.xlsx', {'SIS User ID': [1, 2, 3], 'Design': [2, 5, 1]})
+    assert index.refresh() == 1
+    assert index.student(1)['COMP-101'] == {'Design': 2}
+    assert index.student(3) == {'COMP-101': {'Design': 1}}
+
+    os.remove(tmp_path / 'COMP-103_FA24_01_outcomes.xlsx')
+    assert index.refresh() == 0
+    assert index.student(1) == {'COMP-101': {'Design': 2}}
+    assert [course for course, _, _ in index.catalog()] == ['COMP-101']
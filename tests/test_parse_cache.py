@@ -0,0 +1,37 @@
+import os
+import pandas as pd
+from parse_cache import ParseCache
+
+
+def workbook(tmp_path):
+    path = tmp_path / 'grades.xlsx'
+    pd.DataFrame({'SIS User ID': [1, 2], 'Score': [3, 4]}).to_excel(path, index=False)
+    return str(path)
+
+
+def test_corrupt_entry_is_a_miss_and_is_removed(tmp_path):
+    path = workbook(tmp_path)
+    cache_dir = tmp_path / 'cache'
+    ParseCache(cache_dir=str(cache_dir)).read_excel(path)
+    [entry] = list(cache_dir.iterdir())
+    entry.write_bytes(b'not a pickle')
+    cache = ParseCache(cache_dir=str(cache_dir))
+    df = cache.read_excel(path)
+    assert list(df['Score']) == [3, 4]
+    assert cache.misses == 1
+    assert entry.read_bytes() != b'not a pickle'
+
+
+def test_cache_directory_is_private(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    ParseCache(cache_dir=str(cache_dir)).read_excel(workbook(tmp_path))
+    assert os.stat(cache_dir).st_mode & 0o077 == 0
+
+
+def test_shared_directory_is_not_used(tmp_path):
+    cache_dir = tmp_path / 'shared'
+    cache_dir.mkdir()
+    os.chmod(cache_dir, 0o777)
+    cache = ParseCache(cache_dir=str(cache_dir))
+    assert list(cache.read_excel(workbook(tmp_path))['Score']) == [3, 4]
+    assert list(cache_dir.iterdir()) == []
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+from pipeline import rollup_cohort
+from propagation import DEFAULT_LEVELS, PropagationEngine
+
+
+def engine_for(co_po, po_io):
+    mappings = [co_po, po_io]
+    return PropagationEngine([dict(spec, mapping=mapping) for spec, mapping in zip(DEFAULT_LEVELS, mappings)])
+
+
+def test_cohort_rollup_pools_students_across_courses():
+    co_po = pd.DataFrame({
+        'Course Outcome': ['A-1: Design', 'A-1: Test', 'B-2: Design'],
+        'PO1': [1, 0, 1],
+        'PO2': [0, 1, 0],
+    })
+    po_io = pd.DataFrame({'Program Outcome': ['PO1', 'PO2'], 'IO1': [1, 1]})
+    co_frames = {
+        ('A-1', 'FA24', '01'): pd.DataFrame({'Design': [5, 3], 'Test': [4, 2]}),
+        ('A-1', 'FA24', '02'): pd.DataFrame({'Design': [4], 'Test': [4]}),
+        ('B-2', 'FA24', '01'): pd.DataFrame({'Design': [1, 1, 2]}),
+    }
+    frames = rollup_cohort(engine_for(co_po, po_io), co_frames)
+    po = frames['po'].set_index('Program Outcome')['Cohort Average']
+    # PO1 pools the six Design scores of both courses; PO2 the three Test scores.
+    assert po['PO1'] == pytest.approx(16 / 6)
+    assert po['PO2'] == pytest.approx(10 / 3)
+    assert frames['io']['Cohort Average'].iloc[0] == pytest.approx((16 / 6 + 10 / 3) / 2)
+
+
+def test_cohort_rollup_without_mappings_is_empty():
+    assert rollup_cohort(PropagationEngine([]), {('A-1', 'FA24', '01'): pd.DataFrame({'Design': [5]})}) == {}
+
+
+def test_cohort_rollup_uses_the_mapping_weights():
+    co_po = pd.DataFrame({'Course Outcome': ['A-1: Design', 'A-1: Test'], 'PO1': [2, 1], 'PO2': [0, 1]})
+    po_io = pd.DataFrame({'Program Outcome': ['PO1', 'PO2'], 'IO1': [3, 1]})
+    engine = engine_for(co_po, po_io)
+    co = pd.DataFrame({'Design': [5.0], 'Test': [2.0]})
+    frames = rollup_cohort(engine, {('A-1', 'FA24', '01'): co}, program='Computing BSc')
+    section = engine.run(co, 'A-1')
+    po = frames['po'].set_index('Program Outcome')['Cohort Average']
+    # With one student the pooled averages equal the per-section propagation.
+    assert po['PO1'] == pytest.approx(section['po']['PO1'].iloc[0]) == pytest.approx(4)
+    assert frames['io']['Cohort Average'].iloc[0] == pytest.approx(section['io']['IO1'].iloc[0])
+    assert set(frames['po']['Program']) == {'Computing BSc'}
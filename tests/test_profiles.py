@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from profiles import bucket_profiles, fan_out
+
+LEVELS = ['co', 'po']
+
+
+def section_frames(scores):
+    ids = list(scores)
+    co = pd.DataFrame([scores[sid][:2] for sid in ids], index=ids, columns=['CO1', 'CO2'])
+    po = pd.DataFrame([scores[sid][2:] for sid in ids], index=ids, columns=['PO1'])
+    return {'co': co, 'po': po}, ids
+
+
+def test_students_with_equal_profiles_share_a_bucket():
+    frames, ids = section_frames({'1': (4, 5, 4.5), '2': (4, 5, 4.5), '3': (2, np.nan, 2.0)})
+    buckets, bucket_frames = bucket_profiles(frames, ids, LEVELS)
+    assert buckets['1'] == buckets['2'] != buckets['3']
+    assert list(bucket_frames['co'].index) == [buckets['1'], buckets['3']]
+    rows = fan_out(buckets, [{'SIS User ID': label, 'Overall': label} for label in bucket_frames['co'].index])
+    assert [row['SIS User ID'] for row in rows] == ids
+
+
+def test_labels_do_not_shift_when_students_join():
+    before, ids = section_frames({'1': (4, 5, 4.5), '2': (2, 3, 2.5)})
+    after, ids_after = section_frames({'0': (1, 1, 1.0), '1': (4, 5, 4.5), '2': (2, 3, 2.5)})
+    labels_before = bucket_profiles(before, ids, LEVELS)[0]
+    labels_after = bucket_profiles(after, ids_after, LEVELS)[0]
+    assert labels_before['1'] == labels_after['1']
+    assert labels_before['2'] == labels_after['2']
+
+
+def test_quantum_merges_nearby_profiles():
+    frames, ids = section_frames({'1': (4.1, 5, 4.4), '2': (3.9, 5, 4.6)})
+    buckets, _ = bucket_profiles(frames, ids, LEVELS, quantum=0.5)
+    assert buckets['1'] == buckets['2']
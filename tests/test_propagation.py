@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+from propagation import OutcomeMapping
+
+
+def test_propagate_normalises_by_the_scores_a_student_has():
+    mapping_df = pd.DataFrame({'Course Outcome': ['CO1', 'CO2', 'CO3'], 'PO1': [1, 1, 0], 'PO2': [0, 2, 1], 'PO3': [0, 0, 0]})
+    mapping = OutcomeMapping.compile(mapping_df, 'Course Outcome', 'PO')
+    scores = pd.DataFrame({'CO1': [4, np.nan, np.nan], 'CO2': [2, 3, np.nan], 'CO3': [5, 5, np.nan]}, index=['a', 'b', 'c'])
+    result = mapping.propagate(scores)
+    assert result.loc['a', 'PO1'] == pytest.approx(3)
+    assert result.loc['a', 'PO2'] == pytest.approx((2 * 2 + 5) / 3)
+    # A blank CO1 is left out of b's PO1 rather than counted as zero.
+    assert result.loc['b', 'PO1'] == pytest.approx(3)
+    # No scores at all: unknown, not zero.
+    assert np.isnan(result.loc['c', 'PO1'])
+    # A target nothing maps to keeps the historical 0.0.
+    assert list(result['PO3']) == [0.0, 0.0, 0.0]
+
+
+def test_propagate_skips_sources_missing_from_the_scores():
+    mapping_df = pd.DataFrame({'Course Outcome': ['CO1', 'CO2'], 'PO1': [1, 1]})
+    mapping = OutcomeMapping.compile(mapping_df, 'Course Outcome', 'PO')
+    result = mapping.propagate(pd.DataFrame({'CO1': [4.0]}))
+    assert result['PO1'].iloc[0] == pytest.approx(4)